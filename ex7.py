@@ -1,4 +1,17 @@
+import argparse
 import csv
+import hashlib
+import io
+import json
+import math
+import os
+import pickle
+import shlex
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
 
 # Global BST root
 ownerRoot = None
@@ -15,8 +28,11 @@ def read_hoenn_csv(filename):
       [ { "ID": int, "Name": str, "Type": str, "HP": int,
           "Attack": int, "Can Evolve": "TRUE"/"FALSE" },
         ... ]
+    If the CSV has an optional "Evolves To" column (next-stage IDs separated
+    by ';'), each dict also gets an "Evolves To" string.
     """
     data_list = []
+    evolves_to_column = None
     with open(filename, mode='r', encoding='utf-8') as f:
         reader = csv.reader(f, delimiter=',')  # Use comma as the delimiter
         first_row = True
@@ -24,6 +40,9 @@ def read_hoenn_csv(filename):
             # It's the header row (like ID,Name,Type,HP,Attack,Can Evolve), skip it
             if first_row:
                 first_row = False
+                header = [column.strip().lower() for column in row]
+                if "evolves to" in header:
+                    evolves_to_column = header.index("evolves to")
                 continue
 
             # row => [ID, Name, Type, HP, Attack, Can Evolve]
@@ -37,11 +56,256 @@ def read_hoenn_csv(filename):
                 "Attack": int(row[4]),
                 "Can Evolve": str(row[5]).upper()
             }
+            if evolves_to_column is not None:
+                d["Evolves To"] = row[evolves_to_column].strip() if len(row) > evolves_to_column else ""
             data_list.append(d)
     return data_list
 
 
-HOENN_DATA = read_hoenn_csv("hoenn_pokedex.csv")
+def build_catalog(data_list):
+    """
+    Builds the lookup indexes over a list returned by read_hoenn_csv:
+      { "by_id":     { ID: poke },
+        "by_name":   { lower-cased Name: poke },
+        "by_type":   { lower-cased Type: [poke, ...] },
+        "by_evolve": { "TRUE": [poke, ...], "FALSE": [poke, ...] } }
+    The pokes are the same dicts as in data_list (no copies).
+    If an ID or a name appears twice, the first row wins, like the old linear scan.
+    """
+    catalog = {
+        "by_id": {},
+        "by_name": {},
+        "by_type": {},
+        "by_evolve": {"TRUE": [], "FALSE": []},
+    }
+    for poke in data_list:
+        catalog["by_id"].setdefault(poke["ID"], poke)
+        catalog["by_name"].setdefault(poke["Name"].strip().lower(), poke)
+        catalog["by_type"].setdefault(poke["Type"].strip().lower(), []).append(poke)
+        catalog["by_evolve"].setdefault(poke["Can Evolve"], []).append(poke)
+    return catalog
+
+
+def read_evolutions_csv(filename):
+    """
+    Reads an optional evolutions file with a 'From,To' header and one
+    evolution per row (species IDs). Returns a list of (from ID, to ID).
+    A species may appear in several rows, for branching lines.
+    """
+    edges = []
+    with open(filename, mode='r', encoding='utf-8') as f:
+        reader = csv.reader(f, delimiter=',')
+        next(reader, None)  # Header
+        for row in reader:
+            if not row or not row[0].strip():
+                continue
+            edges.append((int(row[0]), int(row[1])))
+    return edges
+
+
+def build_evolution_graph(data_list, edges=None):
+    """
+    Precomputes every evolution query so each is a single dict lookup:
+      { "next":   { ID: (next-stage ID, ...) },
+        "path":   { ID: (base ID, ..., ID) },
+        "line":   { ID: (base ID, ..., ID, ..., final ID) },  first branch down
+        "finals": { ID: (final-form ID, ...) } }
+    Edges come from 'edges' ((from, to) ID pairs) when given, else from an
+    "Evolves To" column, else from the old rule: an evolvable species
+    evolves into ID + 1.
+    """
+    known = {poke["ID"] for poke in data_list}
+    next_ids = {}
+    if edges is None and any(poke.get("Evolves To") for poke in data_list):
+        edges = [(poke["ID"], int(to_id)) for poke in data_list
+                 for to_id in poke.get("Evolves To", "").replace("|", ";").split(";") if to_id.strip()]
+    if edges is None:
+        edges = [(poke["ID"], poke["ID"] + 1) for poke in data_list if poke["Can Evolve"] == "TRUE"]
+    for from_id, to_id in edges:
+        if from_id in known and to_id in known and to_id not in next_ids.get(from_id, ()):
+            next_ids[from_id] = next_ids.get(from_id, ()) + (to_id,)
+
+    prev_id = {}
+    for from_id, to_ids in next_ids.items():
+        for to_id in to_ids:
+            prev_id.setdefault(to_id, from_id)
+
+    # Walk every line from its base form; 'order' lists parents before children
+    path = {}
+    order = []
+    roots = [poke["ID"] for poke in data_list if poke["ID"] not in prev_id]
+    # Species only reachable through a cycle get treated as their own base
+    roots += [poke["ID"] for poke in data_list if poke["ID"] in prev_id]
+    for root in roots:
+        if root in path:
+            continue
+        path[root] = (root,)
+        queue = deque([root])
+        while queue:
+            current = queue.popleft()
+            order.append(current)
+            for to_id in next_ids.get(current, ()):
+                if to_id not in path:
+                    path[to_id] = path[current] + (to_id,)
+                    queue.append(to_id)
+
+    finals = {}
+    down = {}
+    for poke_id in reversed(order):
+        children = [to_id for to_id in next_ids.get(poke_id, ()) if to_id in finals]
+        if not children:
+            finals[poke_id] = (poke_id,)
+            down[poke_id] = (poke_id,)
+            continue
+        reachable = []
+        for to_id in children:
+            reachable.extend(final_id for final_id in finals[to_id] if final_id not in reachable)
+        finals[poke_id] = tuple(reachable)
+        down[poke_id] = (poke_id,) + down[children[0]]
+
+    line = {poke_id: path[poke_id][:-1] + down[poke_id] for poke_id in path}
+    return {"next": next_ids, "path": path, "line": line, "finals": finals}
+
+
+# The CSV next to this file, wherever the program is started from
+HOENN_CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hoenn_pokedex.csv")
+CATALOG_CACHE_SUFFIX = ".cache"
+CATALOG_CACHE_FORMAT = ("ex7-catalog", 3)
+EVOLUTIONS_SUFFIX = "_evolutions.csv"
+
+# HOENN_DATA and HOENN_CATALOG are loaded on first use, not at import (see
+# load_catalog). Inside this module use get_hoenn_data() / get_catalog();
+# other modules can keep reading ex7.HOENN_DATA and ex7.HOENN_CATALOG.
+
+
+def file_sha256(filename):
+
+    digest = hashlib.sha256()
+    with open(filename, mode='rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def remap_catalog(data_list, catalog, convert):
+    """
+    Returns (data_list, catalog) with every record replaced by
+    convert(record), converting each record once so the indexes keep
+    sharing the rows of data_list.
+    """
+    converted = {id(poke): convert(poke) for poke in data_list}
+    new_catalog = {}
+    for key, index in catalog.items():
+        new_catalog[key] = {k: [converted[id(poke)] for poke in v] if isinstance(v, list) else converted[id(v)]
+                            for k, v in index.items()}
+    return [converted[id(poke)] for poke in data_list], new_catalog
+
+
+def read_catalog_cache(cache_path, csv_stat, csv_path):
+    """
+    Returns (data_list, catalog) from a cache written by write_catalog_cache,
+    or None if it is missing, unreadable or stale. The cache is current when
+    the CSV's size and mtime match; if only the mtime moved (a touch, a fresh
+    checkout), the content hash decides, and on a match the cache is
+    rewritten with the new mtime so the next start doesn't hash again.
+    """
+    try:
+        with open(cache_path, mode='rb') as f:
+            header = pickle.load(f)
+            if header.get("format") != CATALOG_CACHE_FORMAT or header.get("size") != csv_stat.st_size:
+                return None
+            mtime_moved = header.get("mtime_ns") != csv_stat.st_mtime_ns
+            if mtime_moved and header.get("sha256") != file_sha256(csv_path):
+                return None
+            data_list, catalog = pickle.load(f)
+        cached = remap_catalog(data_list, catalog, SpeciesRecord)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, TypeError, ValueError, KeyError):
+        return None
+    if mtime_moved:
+        write_catalog_cache(cache_path, csv_stat, csv_path, *cached, sha256=header["sha256"])
+    return cached
+
+
+def write_catalog_cache(cache_path, csv_stat, csv_path, data_list, catalog, sha256=None):
+    """
+    Saves the parsed rows and indexes next to the CSV as two pickles: a small
+    header used for invalidation, then the payload. Best-effort; a read-only
+    directory just means no cache. Pass sha256 if the CSV's hash is known.
+    """
+    header = {
+        "format": CATALOG_CACHE_FORMAT,
+        "size": csv_stat.st_size,
+        "mtime_ns": csv_stat.st_mtime_ns,
+        "sha256": sha256 or file_sha256(csv_path),
+    }
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, mode='wb') as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            # One pickle for both, so the catalog keeps sharing the row dicts.
+            # Plain dicts, not SpeciesRecords: run as a script the class is
+            # __main__.SpeciesRecord, which an "import ex7" process can't load.
+            pickle.dump(remap_catalog(data_list, catalog, dict), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def load_catalog(csv_path=None, use_cache=True, evolutions_path=None):
+    """
+    Loads the species CSV (HOENN_CSV_PATH by default) into HOENN_DATA (as
+    shared, read-only SpeciesRecords) and HOENN_CATALOG and returns the
+    catalog. With use_cache, the parsed result is kept in '<csv>.cache' and
+    reused until the CSV changes.
+    The evolution graph (catalog["evolution"]) is built from evolutions_path,
+    or '<csv name>_evolutions.csv' if that exists, else from the CSV itself.
+    """
+    global HOENN_DATA, HOENN_CATALOG
+    csv_path = csv_path or HOENN_CSV_PATH
+    cache_path = csv_path + CATALOG_CACHE_SUFFIX
+    csv_stat = os.stat(csv_path)
+    cached = read_catalog_cache(cache_path, csv_stat, csv_path) if use_cache else None
+    if cached is not None:
+        data_list, catalog = cached
+    else:
+        data_list = [SpeciesRecord(row) for row in read_hoenn_csv(csv_path)]
+        catalog = build_catalog(data_list)
+        if use_cache:
+            write_catalog_cache(cache_path, csv_stat, csv_path, data_list, catalog)
+
+    # Not cached: it depends on a second file, and it's one cheap pass anyway
+    evolutions_path = evolutions_path or os.path.splitext(csv_path)[0] + EVOLUTIONS_SUFFIX
+    edges = read_evolutions_csv(evolutions_path) if os.path.exists(evolutions_path) else None
+    catalog["evolution"] = build_evolution_graph(data_list, edges)
+    HOENN_DATA, HOENN_CATALOG = data_list, catalog
+    return catalog
+
+
+def get_catalog():
+
+    catalog = globals().get("HOENN_CATALOG")
+    if catalog is None:
+        catalog = load_catalog()
+    return catalog
+
+
+def get_hoenn_data():
+
+    get_catalog()
+    return HOENN_DATA
+
+
+def __getattr__(name):
+
+    # Module-level lazy attributes: ex7.HOENN_DATA / ex7.HOENN_CATALOG
+    if name == "HOENN_DATA":
+        return get_hoenn_data()
+    if name == "HOENN_CATALOG":
+        return get_catalog()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 ########################
@@ -59,72 +323,461 @@ def read_int_safe(prompt):
 
 def get_poke_dict_by_id(poke_id):
 
-    for poke in HOENN_DATA:
-        if poke["ID"] == poke_id:
-            return poke.copy()
-    return None
-    pass
+    # The shared, read-only catalog record (no copy); .copy() it to modify
+    return get_catalog()["by_id"].get(poke_id)
 
 
 def get_poke_dict_by_name(name):
 
-    name = name.strip().lower()
-    for poke in HOENN_DATA:
-        if poke["Name"].lower() == name:
-            return poke.copy()
-    pass
+    return get_catalog()["by_name"].get(name.strip().lower())
 
 
-def display_pokemon_list(poke_list):
+def get_pokes_by_type(poke_type):
 
-    if not poke_list:
-        print("There are no Pokemons in this Pokedex that match the criteria.")
-    else:
-        for poke in poke_list:
-            print(f"ID: {poke['ID']}, Name: {poke['Name']}, Type: {poke['Type']}, "
-                  f"HP: {poke['HP']}, Attack: {poke['Attack']}, Can Evolve: {poke['Can Evolve']}")
-    pass
+    return get_catalog()["by_type"].get(poke_type.strip().lower(), [])
+
+
+def get_pokes_by_evolve(can_evolve):
+
+    # can_evolve may be a bool or "TRUE"/"FALSE"
+    if isinstance(can_evolve, bool):
+        can_evolve = "TRUE" if can_evolve else "FALSE"
+    return get_catalog()["by_evolve"].get(str(can_evolve).upper(), [])
+
+
+def display_pokemon_list(poke_list, file=None, fmt=None):
+
+    with ListingSink(file, fmt) as sink:
+        if not poke_list:
+            sink.message("There are no Pokemons in this Pokedex that match the criteria.")
+        else:
+            for poke in poke_list:
+                sink.pokemon(poke)
+
+
+# Functions called as listener(event, owner_node, detail) after every change
+# made through the non-interactive cores below. Events and their detail:
+#   "create"  {"ID": starter id}      "delete"  {}
+#   "add"     {"ID": id}              "release" {"ID": id}
+#   "evolve"  {"from": id, "to": id, "merged": True if 'to' was already owned}
+#   "reset"   {}  (owner_node is None; ownerRoot was replaced wholesale, e.g. by
+#                  loading a snapshot, so derived state should be rebuilt)
+MUTATION_LISTENERS = []
+# Held while listeners run, so shared derived state (ranking, journal, ...)
+# sees one change at a time even when the cores are called from several
+# threads. Take it too when reading such state from another thread.
+MUTATION_LOCK = threading.RLock()
+
+
+def add_mutation_listener(listener):
+
+    MUTATION_LISTENERS.append(listener)
+
+
+def remove_mutation_listener(listener):
+
+    if listener in MUTATION_LISTENERS:
+        MUTATION_LISTENERS.remove(listener)
+
+
+def notify_mutation(event, owner_node, detail):
+
+    with MUTATION_LOCK:
+        for listener in MUTATION_LISTENERS:
+            listener(event, owner_node, detail)
+
+
+########################
+# 1b) Owner Pokedex
+########################
+
+class SpeciesRecord(dict):
+    """
+    One species row, read-only. The catalog holds exactly one of these per
+    species and every pokedex references it instead of keeping a copy.
+    Reads (poke["Name"], .get, iteration, json) work like the plain dict it
+    was; anything that would modify it raises TypeError.
+    """
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Species records are shared and read-only; use .copy() for a mutable dict.")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        # dict subclasses normally unpickle through __setitem__
+        return (self.__class__, (dict(self),))
+
+
+class Pokedex:
+    """
+    The container behind owner_node["pokedex"]. It iterates, len()s and
+    truth-tests like the old list, in insertion order, but keeps the entries
+    in a dict keyed by ID, so duplicate checks, lookups and removals are
+    O(1). Entries are the shared catalog records; name lookups go through
+    the catalog's name index, so no per-owner name index is needed.
+    """
+    __slots__ = ("_by_id",)
+
+    def __init__(self, pokes=()):
+        self._by_id = {}
+        for poke in pokes:
+            self.add(poke)
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, poke_id):
+        return poke_id in self._by_id
+
+    def __repr__(self):
+        return f"Pokedex({list(self._by_id.values())!r})"
 
+    def get_by_id(self, poke_id):
+
+        return self._by_id.get(poke_id)
+
+    def get_by_name(self, name):
+
+        species = get_catalog()["by_name"].get(name.strip().lower())
+        if species is None:
+            return None
+        return self._by_id.get(species["ID"])
+
+    def add(self, poke):
+        """Appends poke. Returns False (and changes nothing) if its ID is already here."""
+        if poke["ID"] in self._by_id:
+            return False
+        self._by_id[poke["ID"]] = poke
+        return True
+
+    def remove(self, poke_id):
+        """Removes and returns the entry with this ID, or None if there is none."""
+        return self._by_id.pop(poke_id, None)
+
+
+class OwnerNode:
+    """
+    A node of the owner tree. Uses slots instead of a per-node dict, but
+    keeps the node["name"] / node["left"] = ... style the tree code is
+    written in; subscripting maps straight onto the C-level attribute access.
+    """
+    __slots__ = ("name", "pokedex", "left", "right", "height")
+
+    __getitem__ = object.__getattribute__
+    __setitem__ = object.__setattr__
+
+    def __init__(self, name, pokedex):
+        self.name = name
+        self.pokedex = pokedex
+        self.left = None
+        self.right = None
+        self.height = 1
+
+    def __repr__(self):
+        return f"OwnerNode({self.name!r}, {len(self.pokedex)} Pokemon)"
+
+
+def memory_report(root, sample_size=1000):
+    """
+    Estimates memory use of the owner tree with sys.getsizeof, for the
+    current layout and for the old one (4-key dict nodes, list pokedexes,
+    a dict copy of the species row per owned Pokemon). Up to 'sample_size'
+    owners are measured and the totals extrapolated:
+      { "owners": n, "owned_pokemon": m,
+        "bytes_per_owner":         {"current": ..., "legacy": ...},
+        "bytes_per_owned_pokemon": {"current": ..., "legacy": ...},
+        "total_bytes":             {"current": ..., "legacy": ...} }
+    Owner name strings and the catalog itself are the same in both layouts
+    and are left out.
+    """
+    owners = 0
+    owned = 0
+    sample = []
+    for owner in iter_inorder(root):
+        owners += 1
+        owned += len(owner["pokedex"])
+        if len(sample) < sample_size:
+            sample.append(owner)
+
+    empty_dict = sys.getsizeof({})
+    current_owner = current_entries = legacy_owner = legacy_entries = 0
+    sample_owned = 0
+    for owner in sample:
+        pokedex = owner["pokedex"]
+        sample_owned += len(pokedex)
+        current_owner += sys.getsizeof(owner) + sys.getsizeof(pokedex) + empty_dict
+        # The ID -> record dict grows with the entries; the records are shared
+        current_entries += sys.getsizeof(pokedex._by_id) - empty_dict
+
+        legacy_node = {"name": owner["name"], "pokedex": [], "left": None, "right": None}
+        legacy_list = [dict(poke) for poke in pokedex]
+        legacy_owner += sys.getsizeof(legacy_node) + sys.getsizeof([])
+        legacy_entries += (sys.getsizeof(legacy_list) - sys.getsizeof([])
+                           + sum(sys.getsizeof(poke) for poke in legacy_list))
+
+    def per(total, count):
+        return total / count if count else 0.0
+
+    report = {
+        "owners": owners,
+        "owned_pokemon": owned,
+        "bytes_per_owner": {"current": per(current_owner, len(sample)),
+                            "legacy": per(legacy_owner, len(sample))},
+        "bytes_per_owned_pokemon": {"current": per(current_entries, sample_owned),
+                                    "legacy": per(legacy_entries, sample_owned)},
+    }
+    report["total_bytes"] = {
+        layout: int(report["bytes_per_owner"][layout] * owners
+                    + report["bytes_per_owned_pokemon"][layout] * owned)
+        for layout in ("current", "legacy")
+    }
+    return report
+
+
+########################
+# 1c) Listing Output
+########################
+
+# Every listing (display_pokemon_list, the traversal printers, the by-size
+# sort, batch queries) goes through a ListingSink: a formatter turns each
+# record into text and the sink hands it to the stream in large chunks,
+# instead of one print() per line.
+
+POKEMON_FIELDS = ["ID", "Name", "Type", "HP", "Attack", "Can Evolve"]
+
+
+def pokemon_line(poke):
+
+    return (f"ID: {poke['ID']}, Name: {poke['Name']}, Type: {poke['Type']}, HP: {poke['HP']}"
+            f", Attack: {poke['Attack']}, Can Evolve: {poke['Can Evolve']}\n")
+
+
+class TextFormat:
+    """The menu's own output, line for line."""
+
+    def pokemon(self, poke, owner_name=None):
+        if owner_name is None:
+            return pokemon_line(poke)
+        return f"Owner: {owner_name}, " + pokemon_line(poke)
+
+    def owner(self, owner_name, pokes, header="Owner: "):
+        return f"{header}{owner_name}\n" + "".join(map(pokemon_line, pokes))
+
+    def owner_count(self, owner_name, count):
+        line = f"Owner: {owner_name} (has {count} Pokemon)\n"
+        if count == 0:
+            line += "There are no Pokémons in this Pokedex that match the criteria.\n"
+        return line
+
+    def species_count(self, poke, count):
+        return f"{poke['Name']} (ID {poke['ID']}): {count} owner(s)\n"
+
+    def message(self, text):
+        return text + "\n"
+
+
+class CsvFormat:
+    """
+    CSV rows. A header row is written whenever the kind of record changes:
+    ID,Name,... for Pokemon, Owner,ID,Name,... for owners (one row per
+    Pokemon, an owner-only row for an empty Pokedex), Owner,Count for the
+    by-size sort, ID,Name,Owners for species counts. Messages are not data
+    and are left out.
+    """
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+        self._kind = None
+
+    def _rows(self, kind, header, rows):
+        if kind != self._kind:
+            self._kind = kind
+            self._writer.writerow(header)
+        self._writer.writerows(rows)
+        text = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return text
+
+    def pokemon(self, poke, owner_name=None):
+        row = [poke[field] for field in POKEMON_FIELDS]
+        if owner_name is None:
+            return self._rows("pokemon", POKEMON_FIELDS, [row])
+        return self._rows("owner", ["Owner"] + POKEMON_FIELDS, [[owner_name] + row])
+
+    def owner(self, owner_name, pokes, header=None):
+        rows = [[owner_name] + [poke[field] for field in POKEMON_FIELDS] for poke in pokes]
+        return self._rows("owner", ["Owner"] + POKEMON_FIELDS, rows or [[owner_name]])
+
+    def owner_count(self, owner_name, count):
+        return self._rows("count", ["Owner", "Count"], [[owner_name, count]])
+
+    def species_count(self, poke, count):
+        return self._rows("species", ["ID", "Name", "Owners"], [[poke["ID"], poke["Name"], count]])
+
+    def message(self, text):
+        return ""
+
+
+class JsonLinesFormat:
+    """One JSON object per line."""
+
+    def pokemon(self, poke, owner_name=None):
+        if owner_name is None:
+            return json.dumps(poke) + "\n"
+        return json.dumps({"owner": owner_name, "pokemon": poke}) + "\n"
+
+    def owner(self, owner_name, pokes, header=None):
+        return json.dumps({"owner": owner_name, "pokedex": list(pokes)}) + "\n"
+
+    def owner_count(self, owner_name, count):
+        return json.dumps({"owner": owner_name, "count": count}) + "\n"
+
+    def species_count(self, poke, count):
+        return json.dumps({"pokemon": poke, "owners": count}) + "\n"
+
+    def message(self, text):
+        return json.dumps({"message": text}) + "\n"
+
+
+LISTING_FORMATS = {
+    "text": TextFormat,
+    "csv": CsvFormat,
+    "jsonl": JsonLinesFormat,
+}
+# Format used when a listing function isn't given one (see main's --format)
+LISTING_FORMAT = "text"
+
+
+class ListingSink:
+    """
+    Buffers formatted records and writes them to 'file' (sys.stdout when
+    None, looked up at write time like print() does) in chunks of about
+    'chunk_size' characters. Use it as a context manager so the tail is
+    written when the listing ends.
+    """
+
+    def __init__(self, file=None, fmt=None, chunk_size=1 << 16):
+        fmt = fmt or LISTING_FORMAT
+        if fmt not in LISTING_FORMATS:
+            raise ValueError(f"Unknown listing format '{fmt}'.")
+        self.file = file
+        self.format = LISTING_FORMATS[fmt]()
+        self.chunk_size = chunk_size
+        self._parts = []
+        self._size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def write(self, text):
+
+        if text:
+            self._parts.append(text)
+            self._size += len(text)
+            if self._size >= self.chunk_size:
+                self.flush()
+
+    def flush(self):
+
+        if self._parts:
+            (self.file or sys.stdout).write("".join(self._parts))
+            self._parts = []
+            self._size = 0
+
+    def pokemon(self, poke, owner_name=None):
+        self.write(self.format.pokemon(poke, owner_name))
+
+    def owner(self, owner_name, pokes, header="Owner: "):
+        self.write(self.format.owner(owner_name, pokes, header))
+
+    def owner_count(self, owner_name, count):
+        self.write(self.format.owner_count(owner_name, count))
+
+    def species_count(self, poke, count):
+        self.write(self.format.species_count(poke, count))
+
+    def message(self, text):
+        self.write(self.format.message(text))
 
 ########################
 # 2) BST (By Owner Name)
 ########################
 
-def create_owner_node(owner_name, first_pokemon):
+def make_owner_node(owner_name, pokes=()):
+
+    return OwnerNode(owner_name, Pokedex(pokes))
 
+
+def create_owner(owner_name, first_pokemon):
+    """
+    Non-interactive core of create_owner_node: adds a new owner with starter
+    choice 1/2/3 (Treecko/Torchic/Mudkip) to ownerRoot.
+    Returns (ok, message).
+    """
     first_pokemon = str(first_pokemon)
     if first_pokemon not in ["1","2","3"]:
-        print("Invalid. No new Pokedex created.")
-        return
+        return False, "Invalid. No new Pokedex created."
+    hoenn_data = get_hoenn_data()
     pokemon=None
     if first_pokemon=="1":
-        pokemon=HOENN_DATA[0]
+        pokemon=hoenn_data[0]
     elif first_pokemon=="2":
-        pokemon=HOENN_DATA[3]
+        pokemon=hoenn_data[3]
     else:
-        pokemon=HOENN_DATA[6]
+        pokemon=hoenn_data[6]
     owner_name = owner_name.strip()
 
-    root={
-        "name":owner_name,
-        "pokedex":[],
-        "left":None,
-        "right":None,
-    }
-    root["pokedex"].append(pokemon)
     global ownerRoot
+    if find_owner_bst(ownerRoot, owner_name):
+        return False, f"Owner '{owner_name}' already exists. No new Pokedex created."
+    root = make_owner_node(owner_name, [pokemon])
     ownerRoot =insert_owner_bst(ownerRoot, root)
-    print(f" New Pokedex created for {owner_name} with starter {pokemon['Name']}.")
+    notify_mutation("create", root, {"ID": pokemon["ID"]})
+    return True, f" New Pokedex created for {owner_name} with starter {pokemon['Name']}."
+
+
+def create_owner_node(owner_name, first_pokemon):
+
+    ok, message = create_owner(owner_name, first_pokemon)
+    print(message)
     pass
 
 
+def remove_owner(owner_name):
+    """
+    Deletes an owner's Pokedex from ownerRoot. Returns (ok, message).
+    """
+    global ownerRoot
+    owner_name = owner_name.strip()
+    owner_node = find_owner_bst(ownerRoot, owner_name)
+    if not owner_node:
+        return False, f"'{owner_name}' not found in the database."
+    ownerRoot = delete_owner_bst(ownerRoot, owner_name)
+    notify_mutation("delete", owner_node, {})
+    return True, f"Pokedex belonging to '{owner_name}' has been deleted."
+
+
 def insert_owner_bst(root, new_node):
 
+    if OWNER_TREE_BALANCED:
+        return insert_owner_avl(root, new_node)
     if root is None:
         return new_node
-    if new_node["name"] < root["name"]:
+    # Same case-insensitive order that find_owner_bst searches by
+    if new_node["name"].lower() < root["name"].lower():
         root["left"] = insert_owner_bst(root["left"], new_node)
-    elif new_node["name"] > root["name"]:
+    elif new_node["name"].lower() > root["name"].lower():
         root["right"] = insert_owner_bst(root["right"], new_node)
 
     return root
@@ -132,17 +785,18 @@ def insert_owner_bst(root, new_node):
 
 
 def find_owner_bst(root, owner_name):
-    if root is None:
-        return None
-
-    # Perform case-insensitive comparison (lowercase the names for comparison)
-    if owner_name.lower() < root["name"].lower():
-        return find_owner_bst(root["left"], owner_name)
-    elif owner_name.lower() > root["name"].lower():
-        return find_owner_bst(root["right"], owner_name)
-    elif owner_name.lower() == root["name"].lower():
-        return root
 
+    # Iterative, so a degenerate (sorted-insert) tree can't hit the recursion limit
+    owner_name = owner_name.lower()
+    current = root
+    while current is not None:
+        current_name = current["name"].lower()
+        if owner_name < current_name:
+            current = current["left"]
+        elif owner_name > current_name:
+            current = current["right"]
+        else:
+            return current
     return None
 
 def min_node(node):
@@ -153,8 +807,23 @@ def min_node(node):
     return current
 
 
+def detach_min_node(node):
+    """
+    Unlinks the leftmost node of the subtree rooted at 'node'.
+    Returns (new subtree root, detached node).
+    """
+    if node["left"] is None:
+        return node["right"], node
+    node["left"], smallest = detach_min_node(node["left"])
+    return node, smallest
+
+
 def delete_owner_bst(root, owner_name):
 
+    if OWNER_TREE_BALANCED:
+        return delete_owner_avl(root, owner_name)
+    if root is None:
+        return None
     if owner_name.lower() < root["name"].lower():
         root["left"] = delete_owner_bst(root["left"], owner_name)
     elif owner_name.lower() > root["name"].lower():
@@ -171,148 +840,504 @@ def delete_owner_bst(root, owner_name):
             return root["left"]
         else:
             # Case 3: Node has two children
-            # Find the in-order successor (leftmost node in the right subtree)
-            successor = min_node(root["right"])
-            # Replace current node's value with the successor's value
-            root["name"] = successor["name"]
-            root["pokedex"] = successor["pokedex"]
-            # Delete the successor node
-            root["right"] = delete_owner_bst(root["right"], successor["name"])
+            # Unlink the in-order successor (leftmost node in the right subtree)
+            # and move it into the deleted node's place. The node dicts keep their
+            # identity, so anything holding a reference to an owner stays valid.
+            right, successor = detach_min_node(root["right"])
+            successor["left"] = root["left"]
+            successor["right"] = right
+            return successor
 
     return root
 
+
+########################
+# 2b) Balanced (AVL) Owner Tree
+########################
+
+# When True, insert_owner_bst / delete_owner_bst keep the tree AVL-balanced,
+# so the height stays O(log n) even when owners arrive in sorted order.
+OWNER_TREE_BALANCED = False
+
+
+def set_owner_tree_balanced(enabled):
+    """
+    Turns the balanced mode on or off. Turning it on rebuilds the current
+    ownerRoot into a perfectly balanced tree first, since the plain BST
+    doesn't maintain node heights.
+    """
+    global OWNER_TREE_BALANCED, ownerRoot
+    if enabled and not OWNER_TREE_BALANCED:
+        owners = []
+        gather_all_owners(ownerRoot, owners)
+        ownerRoot = build_balanced_owner_tree(owners)
+    OWNER_TREE_BALANCED = bool(enabled)
+
+
+def node_height(node):
+
+    return node["height"] if node else 0
+
+
+def update_height(node):
+
+    node["height"] = 1 + max(node_height(node["left"]), node_height(node["right"]))
+
+
+def balance_factor(node):
+
+    if node is None:
+        return 0
+    return node_height(node["left"]) - node_height(node["right"])
+
+
+def rotate_right(node):
+
+    pivot = node["left"]
+    node["left"] = pivot["right"]
+    pivot["right"] = node
+    update_height(node)
+    update_height(pivot)
+    return pivot
+
+
+def rotate_left(node):
+
+    pivot = node["right"]
+    node["right"] = pivot["left"]
+    pivot["left"] = node
+    update_height(node)
+    update_height(pivot)
+    return pivot
+
+
+def rebalance(node):
+
+    update_height(node)
+    balance = balance_factor(node)
+    if balance > 1:
+        # Left-Right case => rotate the child first
+        if balance_factor(node["left"]) < 0:
+            node["left"] = rotate_left(node["left"])
+        return rotate_right(node)
+    if balance < -1:
+        # Right-Left case => rotate the child first
+        if balance_factor(node["right"]) > 0:
+            node["right"] = rotate_right(node["right"])
+        return rotate_left(node)
+    return node
+
+
+def insert_owner_avl(root, new_node):
+
+    if root is None:
+        new_node["left"] = None
+        new_node["right"] = None
+        new_node["height"] = 1
+        return new_node
+    if new_node["name"].lower() < root["name"].lower():
+        root["left"] = insert_owner_avl(root["left"], new_node)
+    elif new_node["name"].lower() > root["name"].lower():
+        root["right"] = insert_owner_avl(root["right"], new_node)
+    else:
+        return root
+    return rebalance(root)
+
+
+def detach_min_avl(node):
+
+    # Like detach_min_node, but rebalances on the way back up
+    if node["left"] is None:
+        return node["right"], node
+    node["left"], smallest = detach_min_avl(node["left"])
+    return rebalance(node), smallest
+
+
+def delete_owner_avl(root, owner_name):
+
+    if root is None:
+        return None
+    if owner_name.lower() < root["name"].lower():
+        root["left"] = delete_owner_avl(root["left"], owner_name)
+    elif owner_name.lower() > root["name"].lower():
+        root["right"] = delete_owner_avl(root["right"], owner_name)
+    else:
+        if root["left"] is None:
+            return root["right"]
+        if root["right"] is None:
+            return root["left"]
+        right, successor = detach_min_avl(root["right"])
+        successor["left"] = root["left"]
+        successor["right"] = right
+        root = successor
+    return rebalance(root)
+
+
+def build_balanced_owner_tree(sorted_owners):
+    """
+    Links a list of owner nodes, already sorted by lower-cased name, into a
+    perfectly balanced tree (with AVL heights set) in O(n). Returns the root.
+    """
+    def build(lo, hi):
+        if lo > hi:
+            return None
+        mid = (lo + hi) // 2
+        node = sorted_owners[mid]
+        node["left"] = build(lo, mid - 1)
+        node["right"] = build(mid + 1, hi)
+        update_height(node)
+        return node
+
+    return build(0, len(sorted_owners) - 1)
+
+
+def check_owner_tree(root):
+    """
+    Walks the tree (iteratively) and reports on its shape:
+      { "size": int, "height": int, "max_imbalance": int,
+        "avl_height_bound": float, "heights_valid": bool, "is_avl": bool }
+    'height' and 'max_imbalance' are measured, not read from the nodes;
+    'heights_valid' says whether the stored AVL heights agree with them.
+    """
+    size = 0
+    max_imbalance = 0
+    heights_valid = True
+    measured = {}
+    stack = [(root, False)] if root else []
+    while stack:
+        node, children_done = stack.pop()
+        if not children_done:
+            stack.append((node, True))
+            for child in (node["left"], node["right"]):
+                if child:
+                    stack.append((child, False))
+            continue
+        left_h = measured.pop(id(node["left"]), 0) if node["left"] else 0
+        right_h = measured.pop(id(node["right"]), 0) if node["right"] else 0
+        height = 1 + max(left_h, right_h)
+        measured[id(node)] = height
+        size += 1
+        max_imbalance = max(max_imbalance, abs(left_h - right_h))
+        if node["height"] != height:
+            heights_valid = False
+    height = measured.get(id(root), 0) if root else 0
+    return {
+        "size": size,
+        "height": height,
+        "max_imbalance": max_imbalance,
+        # An AVL tree with n nodes is never taller than ~1.44 * log2(n + 2)
+        "avl_height_bound": 1.4405 * math.log2(size + 2) - 0.3277,
+        "heights_valid": heights_valid,
+        "is_avl": heights_valid and max_imbalance <= 1,
+    }
+
 ########################
 # 3) BST Traversals
 ########################
 
-def bfs_traversal(root):
+# The iter_* generators yield owner nodes lazily, in O(n) total time, using an
+# explicit stack/queue instead of recursion, so any tree depth is fine.
 
-    if not root:
-        return
-    # Initialize a list to represent a queue for level-order traversal
-    queue = [root]
+def iter_bfs(root):
 
+    queue = deque([root] if root else [])
     while queue:
-        current_node = queue.pop(0)
-        print(f"\nOwner: {current_node['name']}")
-
-        # Print each Pokemon in the owner's Pokedex
-        for poke in current_node['pokedex']:
-            print(f"ID: {poke['ID']}, Name: {poke['Name']}, Type: {poke['Type']}, HP: {poke['HP']}"
-                  f", Attack: {poke['Attack']}, Can Evolve: {poke['Can Evolve']}")
-        # Enqueue the left and right children
+        current_node = queue.popleft()
+        yield current_node
         if current_node['left']:
             queue.append(current_node['left'])
         if current_node['right']:
             queue.append(current_node['right'])
 
 
-def pre_order(root):
-
-    if root:
-        print(f"Owner: {root['name']}")
-        # Print each Pokemon in the owner's Pokedex
-        for poke in root['pokedex']:
-            print(f"ID: {poke['ID']}, Name: {poke['Name']}, Type: {poke['Type']}, HP: {poke['HP']}"
-                  f", Attack: {poke['Attack']}, Can Evolve: {poke['Can Evolve']}")
-        # Traverse the left subtree
-        pre_order(root['left'])
-        # Traverse the right subtree
-        pre_order(root['right'])
-
-def in_order(root):
-
-    if root:
-        # Traverse the left subtree
-        in_order(root['left'])
-        print(f"Owner: {root['name']}")
-        # Print each Pokemon in the owner's Pokedex
-        for poke in root['pokedex']:
-            print(f"ID: {poke['ID']}, Name: {poke['Name']}, Type: {poke['Type']}, HP: {poke['HP']}"
-                  f", Attack: {poke['Attack']}, Can Evolve: {poke['Can Evolve']}")
-        # Traverse the right subtree
-        in_order(root['right'])
-
-
-def post_order(root):
-
-    if root:
-        # Traverse the left subtree
-        post_order(root['left'])
-        # Traverse the right subtree
-        post_order(root['right'])
-        print(f"Owner: {root['name']}")
-        # Print each Pokemon in the owner's Pokedex
-        for poke in root['pokedex']:
-            print(f"ID: {poke['ID']}, Name: {poke['Name']}, Type: {poke['Type']}, HP: {poke['HP']}"
-                  f", Attack: {poke['Attack']}, Can Evolve: {poke['Can Evolve']}")
+def iter_preorder(root):
+
+    stack = [root] if root else []
+    while stack:
+        current_node = stack.pop()
+        yield current_node
+        # Push right first so the left subtree comes out first
+        if current_node['right']:
+            stack.append(current_node['right'])
+        if current_node['left']:
+            stack.append(current_node['left'])
+
+
+def iter_inorder(root):
+
+    stack = []
+    current_node = root
+    while stack or current_node:
+        while current_node:
+            stack.append(current_node)
+            current_node = current_node['left']
+        current_node = stack.pop()
+        yield current_node
+        current_node = current_node['right']
+
+
+def iter_postorder(root):
+
+    stack = []
+    last_yielded = None
+    current_node = root
+    while stack or current_node:
+        while current_node:
+            stack.append(current_node)
+            current_node = current_node['left']
+        top = stack[-1]
+        # Go right only if the right subtree hasn't been walked yet
+        if top['right'] and top['right'] is not last_yielded:
+            current_node = top['right']
+        else:
+            stack.pop()
+            yield top
+            last_yielded = top
+
+
+def iter_range(root, low=None, high=None, after=None):
+    """
+    Yields owner nodes in name order whose lower-cased name is >= low and
+    < high (either bound may be None), resuming strictly after the name
+    'after' when given. Subtrees entirely outside the range are never
+    entered, so k owners cost O(log n + k) on the balanced tree.
+    """
+    low = low.lower() if low is not None else None
+    high = high.lower() if high is not None else None
+    after = after.lower() if after is not None else None
+    stack = []
+    current_node = root
+    while stack or current_node:
+        while current_node:
+            key = current_node['name'].lower()
+            if (low is not None and key < low) or (after is not None and key <= after):
+                # This node and its whole left subtree are below the range
+                current_node = current_node['right']
+            else:
+                stack.append(current_node)
+                current_node = current_node['left']
+        if not stack:
+            return
+        current_node = stack.pop()
+        if high is not None and current_node['name'].lower() >= high:
+            return
+        yield current_node
+        current_node = current_node['right']
+
+
+def prefix_upper_bound(prefix):
+
+    # Smallest string greater than every string starting with 'prefix'
+    prefix = prefix.lower()
+    while prefix and prefix[-1] == chr(sys.maxunicode):
+        prefix = prefix[:-1]
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1) if prefix else None
+
+
+def iter_prefix(root, prefix, after=None):
+
+    return iter_range(root, low=prefix, high=prefix_upper_bound(prefix), after=after)
+
+
+def owner_page(owners, limit):
+    """
+    Takes up to 'limit' owners from an iter_range/iter_prefix iterator.
+    Returns (owners, cursor): pass the cursor back as 'after' for the next
+    page; it is None when there are no more owners. Raises ValueError if
+    'limit' is below 1.
+    """
+    if limit < 1:
+        raise ValueError(f"Page limit must be at least 1, got {limit}.")
+    page = []
+    for owner_node in owners:
+        if len(page) == limit:
+            return page, page[-1]['name']
+        page.append(owner_node)
+    return page, None
+
+
+def print_owners(owners, header="Owner: ", file=None, fmt=None):
+
+    # Streams owner blocks to the sink as the traversal yields them
+    with ListingSink(file, fmt) as sink:
+        for owner in owners:
+            sink.owner(owner['name'], owner['pokedex'], header)
+
+
+def bfs_traversal(root, file=None, fmt=None):
+
+    print_owners(iter_bfs(root), header="\nOwner: ", file=file, fmt=fmt)
+
+
+def pre_order(root, file=None, fmt=None):
+
+    print_owners(iter_preorder(root), file=file, fmt=fmt)
+
+
+def in_order(root, file=None, fmt=None):
+
+    print_owners(iter_inorder(root), file=file, fmt=fmt)
+
+
+def post_order(root, file=None, fmt=None):
+
+    print_owners(iter_postorder(root), file=file, fmt=fmt)
 
 ########################
 # 4) Pokedex Operations
 ########################
 
+def add_pokemon_id(owner_node, pokemon_id):
+    """
+    Non-interactive core of add_pokemon_to_owner. Returns (ok, message).
+    """
+    pokemon = get_poke_dict_by_id(int(pokemon_id))
+    if not pokemon:
+        return False, f"ID {pokemon_id} not found in Honen data."
+    if not owner_node["pokedex"].add(pokemon):
+        return False, f"Pokemon already in the list. No changes made."
+    notify_mutation("add", owner_node, {"ID": pokemon["ID"]})
+    return True, f"Pokemon {pokemon['Name']} (ID {pokemon_id}) added to {owner_node['name']}'s Pokedex."
+
+
+def release_pokemon_name(owner_node, name_to_release):
+    """
+    Non-interactive core of release_pokemon_by_name. Returns (ok, message).
+    """
+    name_to_release = name_to_release.strip().lower()
+    poke = owner_node["pokedex"].get_by_name(name_to_release)
+    if poke is None:
+        return False, f"No Pokemon named '{name_to_release}' in {owner_node['name']}'s Pokedex."
+    owner_node["pokedex"].remove(poke["ID"])
+    notify_mutation("release", owner_node, {"ID": poke["ID"]})
+    return True, f"Releasing{poke['Name']} from {owner_node['name']}."
+
+
+def evolve_pokemon_name(owner_node, name_to_evolve):
+    """
+    Non-interactive core of evolve_pokemon_by_name. Returns (ok, message);
+    the message may span two lines.
+    """
+    name_to_evolve = name_to_evolve.strip().lower()
+
+    # Find the Pokemon to evolve in the owner's Pokedex
+    poke = owner_node["pokedex"].get_by_name(name_to_evolve)
+    if poke is None:
+        return False, f"No Pokemon named '{name_to_evolve}' found in {owner_node['name']}'s Pokedex."
+    if poke["Can Evolve"] == "FALSE":
+        return False, f"Pokemon {poke['Name']} cannot evolve."
+    # Find the evolved Pokemon in the evolution graph (the first branch, if several)
+    evolved_poke = next_evolution(poke["ID"])
+
+    if not evolved_poke:
+        return False, f"No evolution found for Pokemon {poke['Name']} (ID {poke['ID']})."
+
+    merged = replace_with_evolution(owner_node, poke, evolved_poke)
+    message = (f"Pokemon evolved from {poke['Name']} (ID {poke['ID']}) "
+               f"to {evolved_poke['Name']} (ID {evolved_poke['ID']}).")
+    if merged:
+        message += f"\n{evolved_poke['Name']} was already present; releasing it immediately."
+    return True, message
+
+
+def replace_with_evolution(owner_node, poke, evolved_poke):
+    """
+    Swaps 'poke' for 'evolved_poke' in the owner's pokedex and notifies the
+    listeners. Returns True if the evolved form was already there (so the
+    two merged into one entry).
+    """
+    # Remove the original Pokemon
+    owner_node["pokedex"].remove(poke["ID"])
+    # Add the evolved Pokemon, unless it already exists
+    merged = not owner_node["pokedex"].add(evolved_poke)
+    notify_mutation("evolve", owner_node, {"from": poke["ID"], "to": evolved_poke["ID"], "merged": merged})
+    return merged
+
+
+def evolve_all_pokemon(owner_node, to_final=False):
+    """
+    Evolves every evolvable Pokemon the owner holds by one stage, or straight
+    to its final form with to_final=True (first branch, like a single
+    evolve). Targets are worked out from the Pokedex as it was before the
+    call, so the result doesn't depend on the order Pokemon were added, and
+    forms that appear during this call aren't evolved again.
+    Returns (number evolved, number that merged into an existing entry).
+    """
+    evolution = get_catalog()["evolution"]
+    catalog_by_id = get_catalog()["by_id"]
+    plan = []
+    for poke in owner_node["pokedex"]:
+        if poke["Can Evolve"] == "FALSE" or not evolution["next"].get(poke["ID"]):
+            continue
+        if to_final:
+            target_id = evolution["line"][poke["ID"]][-1]
+        else:
+            target_id = evolution["next"][poke["ID"]][0]
+        plan.append((poke, catalog_by_id[target_id]))
+    # Later stages first: a target is then never an entry still waiting to
+    # evolve, so each swap (and its journal record) lands on the final set
+    plan.sort(key=lambda step: -len(evolution["path"][step[0]["ID"]]))
+    merged = 0
+    for poke, evolved_poke in plan:
+        merged += replace_with_evolution(owner_node, poke, evolved_poke)
+    return len(plan), merged
+
+
+def evolve_all_owners(root, to_final=False):
+    """Runs evolve_all_pokemon for every owner. Returns the summed (evolved, merged)."""
+    evolved = merged = 0
+    for owner_node in iter_inorder(root):
+        owner_evolved, owner_merged = evolve_all_pokemon(owner_node, to_final)
+        evolved += owner_evolved
+        merged += owner_merged
+    return evolved, merged
+
+
+def next_evolutions(poke_id):
+    """All next-stage species of poke_id (several for a branching line)."""
+    catalog = get_catalog()
+    return [catalog["by_id"][to_id] for to_id in catalog["evolution"]["next"].get(poke_id, ())]
+
+
+def next_evolution(poke_id):
+    """The first next-stage species of poke_id, or None if it doesn't evolve."""
+    catalog = get_catalog()
+    to_ids = catalog["evolution"]["next"].get(poke_id)
+    return catalog["by_id"][to_ids[0]] if to_ids else None
+
+
+def evolution_chain(poke_id):
+    """The whole line through poke_id, base form first, following the first branch down."""
+    catalog = get_catalog()
+    return [catalog["by_id"][line_id] for line_id in catalog["evolution"]["line"].get(poke_id, ())]
+
+
+def final_forms(poke_id):
+    """Every final form poke_id can end up as (itself, if it doesn't evolve)."""
+    catalog = get_catalog()
+    return [catalog["by_id"][final_id] for final_id in catalog["evolution"]["finals"].get(poke_id, ())]
+
+
 def add_pokemon_to_owner(owner_node):
 
     pokemon_id = read_int_safe("Enter Pokemon ID to add: ")
-    pokemon = get_poke_dict_by_id(int(pokemon_id))
-    if not pokemon:
-        print(f"ID {pokemon_id} not found in Honen data.")
-        return
-    for existing_pokemon in owner_node["pokedex"]:
-        if existing_pokemon["ID"] == pokemon["ID"]:
-            print(f"Pokemon already in the list. No changes made.")
-            return
-    owner_node["pokedex"].append(pokemon)
-    print(f"Pokemon {pokemon['Name']} (ID {pokemon_id}) added to {owner_node['name']}'s Pokedex.")
+    ok, message = add_pokemon_id(owner_node, pokemon_id)
+    print(message)
     pass
 
 def release_pokemon_by_name(owner_node):
 
-    name_to_release = input("Enter Pokemon Name to release: ").strip().lower()
-    for poke in owner_node["pokedex"]:
-        if poke["Name"].strip().lower() == name_to_release:
-            owner_node["pokedex"].remove(poke)
-            print(f"Releasing{poke['Name']} from {owner_node['name']}.")
-            return
-    print(f"No Pokemon named '{name_to_release}' in {owner_node['name']}'s Pokedex.")
-
+    name_to_release = input("Enter Pokemon Name to release: ")
+    ok, message = release_pokemon_name(owner_node, name_to_release)
+    print(message)
     pass
 
 
 def evolve_pokemon_by_name(owner_node):
-    name_to_evolve = input("Enter Pokemon name to evolve: ").strip().lower()
 
-    # Find the Pokemon to evolve in the owner's Pokedex
-    for poke in owner_node["pokedex"]:
-        if poke["Name"].strip().lower() == name_to_evolve:
-            if poke["Can Evolve"] == "FALSE":
-                print(f"Pokemon {poke['Name']} cannot evolve.")
-                return
-            # Find the evolved Pokemon in Hoenn data
-            evolution_id = poke["ID"] + 1  # Assuming evolution is the next ID
-            evolved_poke = get_poke_dict_by_id(evolution_id)
-
-            if not evolved_poke:
-                print(f"No evolution found for Pokemon {poke['Name']} (ID {poke['ID']}).")
-                return
-
-            # Remove the original Pokemon
-            owner_node["pokedex"].remove(poke)
-
-            # Check if the evolved Pokemon already exists
-            for existing_pokemon in owner_node["pokedex"]:
-                if existing_pokemon["ID"] == evolved_poke["ID"]:
-                    print(
-                        f"Pokemon evolved from {poke['Name']} (ID {poke['ID']}) to {evolved_poke['Name']} (ID {evolved_poke['ID']}).")
-                    print(f"{evolved_poke['Name']} was already present; releasing it immediately.")
-                    return
-            # Add the evolved Pokemon
-            owner_node["pokedex"].append(evolved_poke)
-            print(
-                f"Pokemon evolved from {poke['Name']} (ID {poke['ID']}) to {evolved_poke['Name']} (ID {evolved_poke['ID']}).")
-            return
-    # If Pokemon not found
-    print(f"No Pokemon named '{name_to_evolve}' found in {owner_node['name']}'s Pokedex.")
+    name_to_evolve = input("Enter Pokemon name to evolve: ")
+    ok, message = evolve_pokemon_name(owner_node, name_to_evolve)
+    print(message)
     pass
 
 
@@ -322,30 +1347,45 @@ def evolve_pokemon_by_name(owner_node):
 
 def gather_all_owners(root, arr):
 
-    if root:
-        gather_all_owners(root["left"], arr)
-        arr.append(root)  # Collect the current node
-        gather_all_owners(root["right"], arr)
+    # In-order, so arr comes out sorted by owner name
+    arr.extend(iter_inorder(root))
 
-def sort_owners_by_num_pokemon():
+# Set by pokedex_ranking.enable_owner_ranking() to an index that is kept sorted
+# as owners change, so the listing below doesn't have to re-sort every time
+OWNER_RANKING = None
+# Set by pokedex_species.enable_species_index() to the species ID -> owners
+# index behind the batch "whoowns" and "typecount" commands
+SPECIES_INDEX = None
 
-    if not ownerRoot:
-        print("No owners at all.")
-        return
 
-    owners = []
-    gather_all_owners(ownerRoot, owners)
-    print("=== The Owners we have, sorted by number of Pokemons ===")
+def sort_owners_by_num_pokemon(file=None, fmt=None):
+
+    with ListingSink(file, fmt) as sink:
+        if not ownerRoot:
+            sink.message("No owners at all.")
+            return
+        sink.message("=== The Owners we have, sorted by number of Pokemons ===")
+        for owner in sorted_owners_by_num_pokemon():
+            sink.owner_count(owner["name"], len(owner["pokedex"]))
 
-    # Sort by the size of the pokedex, then by name (case-insensitive)
-    owners.sort(key=lambda owner: (len(owner["pokedex"]), owner["name"].lower()))
 
-    # Print sorted results
-    for owner in owners:
-        num_pokemons = len(owner["pokedex"])
-        print(f"Owner: {owner['name']} (has {num_pokemons} Pokemon)")
-        if num_pokemons == 0:
-            print("There are no Pokémons in this Pokedex that match the criteria.")
+def sorted_owners_by_num_pokemon():
+
+    if RESULT_CACHE is not None:
+        return RESULT_CACHE.get_or_compute(None, ("ranking",), lambda: list(ranked_owners()))
+    return ranked_owners()
+
+
+def ranked_owners():
+
+    if OWNER_RANKING is not None:
+        owners = OWNER_RANKING.iter_sorted()
+    else:
+        owners = []
+        gather_all_owners(ownerRoot, owners)
+        # Sort by the size of the pokedex, then by name (case-insensitive)
+        owners.sort(key=lambda owner: (len(owner["pokedex"]), owner["name"].lower()))
+    return owners
 
 ########################
 # 6) Print All
@@ -373,6 +1413,60 @@ def print_all_owners(root):
 # 7) The Display Filter Sub-Menu
 ########################
 
+# Filter kinds understood by filter_pokedex (and by the batch "query" command)
+FILTER_KINDS = ("type", "evolvable", "attack", "hp", "prefix", "all")
+
+
+def filter_pokedex(pokedex, kind, value=None):
+    """
+    Returns the list of pokes in 'pokedex' that pass one display filter:
+      "type" (value = type name), "evolvable", "attack" / "hp" (value = int,
+      strictly above), "prefix" (value = starting letters) or "all".
+    """
+    if kind == "type":
+        poke_type = str(value).strip().lower()
+        return [poke for poke in pokedex if poke["Type"].lower() == poke_type]
+    if kind == "evolvable":
+        return [poke for poke in pokedex if poke["Can Evolve"] == "TRUE"]
+    if kind == "attack":
+        return [poke for poke in pokedex if poke["Attack"] > int(value)]
+    if kind == "hp":
+        return [poke for poke in pokedex if poke["HP"] > int(value)]
+    if kind == "prefix":
+        starting_letters = str(value).strip().lower()
+        return [poke for poke in pokedex if poke["Name"].lower().startswith(starting_letters)]
+    if kind == "all":
+        return list(pokedex)
+    raise ValueError(f"Unknown filter '{kind}'.")
+
+
+# Set by pokedex_cache.enable_result_cache() to an LRU of filter / query /
+# ranking results that mutation events invalidate
+RESULT_CACHE = None
+
+
+def filter_owner(owner_node, kind, value=None):
+
+    # filter_pokedex over one owner's Pokedex, through RESULT_CACHE when it is on
+    if RESULT_CACHE is None:
+        return filter_pokedex(owner_node["pokedex"], kind, value)
+    key = ("filter", kind, None if value is None else str(value).strip().lower())
+    return RESULT_CACHE.get_or_compute(owner_node["name"], key,
+                                       lambda: filter_pokedex(owner_node["pokedex"], kind, value))
+
+
+def check_filter(kind, value=None):
+
+    # Returns why filter_pokedex can't run kind/value, or None if it can
+    if kind not in FILTER_KINDS:
+        return f"Unknown filter '{kind}'."
+    if kind in ("attack", "hp") and (value is None or not str(value).strip().lstrip("-").isdigit()):
+        return f"Filter '{kind}' needs an integer threshold."
+    if kind in ("type", "prefix") and value is None:
+        return f"Filter '{kind}' needs a value."
+    return None
+
+
 def display_filter_sub_menu(owner_node):
 
     choice = 0
@@ -388,20 +1482,19 @@ def display_filter_sub_menu(owner_node):
         choice = read_int_safe("Your choice: ")
         filtered_pokedex = []
         if choice == 1:
-            poke_type = input("Which Type? (e.g. GRASS, WATER): ").strip().lower()
-            filtered_pokedex = [poke for poke in owner_node["pokedex"] if poke["Type"].lower() == poke_type]
+            poke_type = input("Which Type? (e.g. GRASS, WATER): ")
+            filtered_pokedex = filter_owner(owner_node, "type", poke_type)
         elif choice == 2:
-            filtered_pokedex = [poke for poke in owner_node["pokedex"] if poke["Can Evolve"] == "TRUE"]
+            filtered_pokedex = filter_owner(owner_node, "evolvable")
         elif choice == 3:
             attack_threshold = read_int_safe("Enter Attack threshold: ")
-            filtered_pokedex = [poke for poke in owner_node["pokedex"] if poke["Attack"] > attack_threshold]
+            filtered_pokedex = filter_owner(owner_node, "attack", attack_threshold)
         elif choice == 4:
             hp_threshold = read_int_safe("Enter HP threshold: ")
-            filtered_pokedex = [poke for poke in owner_node["pokedex"] if poke["HP"] > hp_threshold]
+            filtered_pokedex = filter_owner(owner_node, "hp", hp_threshold)
         elif choice == 5:
-            starting_letters = input("Starting letter(s): ").strip().lower()
-            filtered_pokedex = [poke for poke in owner_node["pokedex"] if
-                                poke["Name"].lower().startswith(starting_letters)]
+            starting_letters = input("Starting letter(s): ")
+            filtered_pokedex = filter_owner(owner_node, "prefix", starting_letters)
         elif choice == 6:
             filtered_pokedex = owner_node["pokedex"]
         elif choice == 7:
@@ -484,13 +1577,9 @@ def main_menu():
         elif choice == 2:
             existing_pokedex()
         elif choice == 3:
-            owner_name = input("Owner name: ").strip()
-            existing_owner = find_owner_bst(ownerRoot, owner_name)
-            if existing_owner:
-                ownerRoot = delete_owner_bst(ownerRoot, owner_name)
-                print(f"Pokedex belonging to '{owner_name}' has been deleted.")
-            else:
-                print(f"'{owner_name}' not found in the database.")
+            owner_name = input("Owner name: ")
+            ok, message = remove_owner(owner_name)
+            print(message)
         elif choice == 4:
             sort_owners_by_num_pokemon()
         elif choice == 5:
@@ -501,10 +1590,345 @@ def main_menu():
             print("Invalid choice. Please try again.")
     pass
 
-def main():
+########################
+# 9) Batch Mode
+########################
+
+# Traversal names accepted by the batch "print" command
+TRAVERSALS = {
+    "bfs": bfs_traversal,
+    "pre": pre_order,
+    "in": in_order,
+    "post": post_order,
+}
 
-    main_menu()
-    pass
+
+def run_batch_command(args, out):
+    """
+    Runs one parsed batch command against ownerRoot. Listings are written to
+    'out'. Returns (ok, message). Commands:
+      create <owner> <1|2|3>        add <owner> <id> [<id> ...]
+      release <owner> <name>        evolve <owner> <name>
+      delete <owner>                query <owner> <filter> [value]
+      print [bfs|pre|in|post]       sort
+      evolveall <owner|*> [final]
+      owners <prefix> [after=<name>] [limit=n]
+      owners <low>..<high> [after=<name>] [limit=n]
+      import <file> [replace]       export <file>
+      stats [text|json|reset]       (needs --stats)
+      cache                         (needs --result-cache)
+      whoowns <pokemon name|id>     typecount <type>
+      query <owner|*> <condition> ... [sort=[-]field] [limit=n]
+    "owners" lists owners whose name starts with the prefix, or lies in
+    [low, high) (either end may be left empty), in name order.
+    The last form runs a pokedex_query query, e.g.
+      query * type=water attack>60 evolvable sort=-attack limit=10
+    """
+    command, args = args[0].lower(), args[1:]
+    if command == "create" and len(args) == 2:
+        return create_owner(args[0], args[1])
+    if command == "delete" and len(args) == 1:
+        return remove_owner(args[0])
+    if command == "print" and len(args) <= 1:
+        traversal = TRAVERSALS.get(args[0].lower() if args else "bfs")
+        if traversal is None:
+            return False, f"Unknown traversal '{args[0]}'."
+        traversal(ownerRoot, file=out)
+        return True, "printed"
+    if command == "sort" and not args:
+        sort_owners_by_num_pokemon(file=out)
+        return True, "sorted"
+
+    if command == "evolveall" and len(args) in (1, 2):
+        if len(args) == 2 and args[1].lower() != "final":
+            return False, f"Bad command: {' '.join([command] + args)}"
+        to_final = len(args) == 2
+        if args[0].strip() == "*":
+            evolved, merged = evolve_all_owners(ownerRoot, to_final)
+        else:
+            owner_node = find_owner_bst(ownerRoot, args[0].strip())
+            if not owner_node:
+                return False, f"Owner'{args[0].strip()}' not found."
+            evolved, merged = evolve_all_pokemon(owner_node, to_final)
+        return True, f"{evolved} Pokemon evolved ({merged} merged into ones already owned)"
+
+    if command == "owners" and args:
+        return run_batch_owners(args[0], args[1:], out)
+    if command == "import" and len(args) in (1, 2):
+        if len(args) == 2 and args[1].lower() != "replace":
+            return False, f"Bad command: {' '.join([command] + args)}"
+        return run_batch_import(args[0], replace=len(args) == 2)
+    if command == "stats" and len(args) <= 1:
+        instrument = sys.modules.get("pokedex_instrument")
+        if instrument is None or not instrument.is_enabled():
+            return False, "Instrumentation is off; start with --stats."
+        mode = args[0].lower() if args else "text"
+        if mode == "reset":
+            instrument.reset()
+        elif mode in ("text", "json"):
+            (instrument.dump_json if mode == "json" else instrument.dump_text)(out)
+        else:
+            return False, f"Bad command: {' '.join([command] + args)}"
+        return True, f"stats {mode}"
+    if command == "whoowns" and len(args) == 1:
+        poke = get_poke_dict_by_id(int(args[0])) if args[0].isdigit() else get_poke_dict_by_name(args[0])
+        if poke is None:
+            return False, f"No Pokemon '{args[0]}' in Hoenn data."
+        names = sorted((owner["name"] for owner in species_index().owners_of(poke["ID"])), key=str.lower)
+        with ListingSink(out) as sink:
+            for name in names:
+                sink.pokemon(poke, name)
+        return True, f"{len(names)} owner(s) have {poke['Name']}"
+    if command == "typecount" and len(args) == 1:
+        counts = species_index().counts_by_type(args[0])
+        if not counts:
+            return False, f"No Pokemon of type '{args[0]}' in Hoenn data."
+        with ListingSink(out) as sink:
+            for poke, owners in counts:
+                sink.species_count(poke, owners)
+        return True, f"{len(counts)} species"
+    if command == "cache" and not args:
+        if RESULT_CACHE is None:
+            return False, "Result cache is off; start with --result-cache."
+        return True, ", ".join(f"{name}={value:.3f}" if isinstance(value, float) else f"{name}={value}"
+                               for name, value in RESULT_CACHE.stats().items())
+    if command == "export" and len(args) == 1:
+        import pokedex_import
+        try:
+            pokedex_import.export_file(args[0])
+        except OSError as e:
+            return False, f"Export failed: {e}"
+        return True, f"exported to {args[0]}"
+
+    if command == "query" and len(args) >= 2 and args[1].lower() not in FILTER_KINDS:
+        return run_batch_query(args[0].strip(), args[1:], out)
+
+    if command in ("add", "release", "evolve", "query") and len(args) >= 2:
+        owner_node = find_owner_bst(ownerRoot, args[0].strip())
+        if not owner_node:
+            return False, f"Owner'{args[0].strip()}' not found."
+        if command == "add":
+            results = [add_pokemon_id(owner_node, poke_id) if poke_id.lstrip("-").isdigit()
+                       else (False, f"Invalid Pokemon ID '{poke_id}'.")
+                       for poke_id in args[1:]]
+            return all(ok for ok, _ in results), "\n".join(message for _, message in results)
+        if command == "release" and len(args) == 2:
+            return release_pokemon_name(owner_node, args[1])
+        if command == "evolve" and len(args) == 2:
+            return evolve_pokemon_name(owner_node, args[1])
+        if command == "query" and len(args) <= 3:
+            kind = args[1].lower()
+            if kind not in FILTER_KINDS:
+                return False, f"Unknown filter '{args[1]}'."
+            value = args[2] if len(args) == 3 else None
+            problem = check_filter(kind, value)
+            if problem:
+                return False, problem
+            filtered_pokedex = filter_owner(owner_node, kind, value)
+            display_pokemon_list(filtered_pokedex, file=out)
+            return True, f"{len(filtered_pokedex)} match(es)"
+
+    return False, f"Bad command: {' '.join([command] + args)}"
+
+
+def run_batch_owners(selector, options, out):
+
+    after, limit = None, None
+    for option in options:
+        name, _, value = option.partition("=")
+        if name.lower() == "after" and value:
+            after = value
+        elif name.lower() == "limit" and value.isdigit() and int(value) > 0:
+            limit = int(value)
+        else:
+            return False, f"Bad owners option '{option}'."
+    if ".." in selector:
+        low, _, high = selector.partition("..")
+        owners = iter_range(ownerRoot, low or None, high or None, after=after)
+    else:
+        owners = iter_prefix(ownerRoot, selector, after=after)
+    if limit is None:
+        page, cursor = list(owners), None
+    else:
+        page, cursor = owner_page(owners, limit)
+    print_owners(page, file=out)
+    return True, f"{len(page)} owner(s)" + (f", next after={cursor}" if cursor else "")
+
+
+def species_index():
+
+    if SPECIES_INDEX is None:
+        import pokedex_species
+        pokedex_species.enable_species_index()
+    return SPECIES_INDEX
+
+
+def run_batch_import(filename, replace=False):
+
+    import pokedex_import
+    try:
+        stats = pokedex_import.import_file(filename, replace=replace)
+    except (OSError, ValueError) as e:
+        return False, f"Import failed: {e}"
+    return True, (f"imported {stats['owners']} owner(s) with {stats['pokemon']} Pokemon"
+                  f" ({stats['merged']} merged, {stats['unknown_ids']} unknown ID(s),"
+                  f" {stats['bad_records']} bad record(s))")
+
+
+def run_batch_query(owner_name, tokens, out):
+
+    import pokedex_query
+    conditions, sort, limit = pokedex_query.parse_query(tokens)
+    count = 0
+    if owner_name == "*":
+        with ListingSink(out) as sink:
+            for owner, poke in pokedex_query.query_all_owners(ownerRoot, conditions, sort, limit):
+                sink.pokemon(poke, owner['name'])
+                count += 1
+        return True, f"{count} match(es)"
+    owner_node = find_owner_bst(ownerRoot, owner_name)
+    if not owner_node:
+        return False, f"Owner'{owner_name}' not found."
+    if RESULT_CACHE is None:
+        filtered_pokedex = list(pokedex_query.query_owner(owner_node, conditions, sort, limit))
+    else:
+        filtered_pokedex = RESULT_CACHE.get_or_compute(
+            owner_node["name"], ("query", tuple(token.lower() for token in tokens)),
+            lambda: list(pokedex_query.query_owner(owner_node, conditions, sort, limit)))
+    display_pokemon_list(filtered_pokedex, file=out)
+    return True, f"{len(filtered_pokedex)} match(es)"
+
+
+def run_batch(lines, out, quiet=False, status_out=None):
+    """
+    Runs a command script (an iterable of lines, e.g. an open file or stdin)
+    without any prompts. Blank lines and lines starting with '#' are skipped;
+    arguments are split like a shell, so quote owner names with spaces.
+    After each command a status line '<ok|error> <line no>: <message>' is
+    written to 'status_out' (default 'out'; only errors when quiet=True),
+    and a throughput summary at the end. Returns (number of commands,
+    number of failures).
+    """
+    status_out = status_out or out
+    total = 0
+    failed = 0
+    start = time.perf_counter()
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        total += 1
+        try:
+            ok, message = run_batch_command(shlex.split(line), out)
+        except ValueError as e:
+            ok, message = False, str(e)
+        if not ok:
+            failed += 1
+        if not ok or not quiet:
+            status = "ok" if ok else "error"
+            status_out.write(f"{status} {line_no}: {message.strip()}\n")
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed > 0 else 0.0
+    status_out.write(f"Batch done: {total} commands ({total - failed} ok, {failed} failed) "
+                     f"in {elapsed:.3f}s, {rate:.0f} ops/sec\n")
+    out.flush()
+    status_out.flush()
+    return total, failed
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Hoenn Pokedex manager.")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="run a command script instead of the menu ('-' reads stdin)")
+    parser.add_argument("--quiet", action="store_true",
+                        help="in batch mode, only report failed commands")
+    parser.add_argument("--balanced", action="store_true",
+                        help="keep the owner tree AVL-balanced")
+    parser.add_argument("--data-dir", metavar="DIR",
+                        help="load owners from DIR at start and journal every change there")
+    parser.add_argument("--import", dest="import_files", metavar="FILE", action="append", default=[],
+                        help="bulk-load owners from a CSV or JSON-lines file before starting")
+    parser.add_argument("--export", metavar="FILE",
+                        help="write all owners to a CSV or JSON-lines file on exit")
+    parser.add_argument("--format", choices=sorted(LISTING_FORMATS), default="text",
+                        help="listing format in batch mode; status lines go to stderr unless it is text")
+    parser.add_argument("--result-cache", type=int, default=0, metavar="SIZE",
+                        help="cache up to SIZE filter/query/ranking results (0: off)")
+    parser.add_argument("--stats", choices=["text", "json"],
+                        help="time the tree and Pokedex operations and print the stats to stderr on exit")
+    parser.add_argument("--profile", choices=["cprofile", "tracemalloc"],
+                        help="run under cProfile or tracemalloc and print the report to stderr on exit")
+    args = parser.parse_args(argv)
+
+    instrument = None
+    if args.stats or args.profile:
+        import pokedex_instrument as instrument
+        if args.stats:
+            instrument.enable()
+    try:
+        with instrument.profile(args.profile) if args.profile else nullcontext():
+            failed = run_session(args)
+    finally:
+        if args.stats:
+            (instrument.dump_json if args.stats == "json" else instrument.dump_text)(sys.stderr)
+    if failed:
+        sys.exit(1)
+
+
+def run_session(args):
+
+    if args.balanced:
+        set_owner_tree_balanced(True)
+    store = None
+    if args.data_dir:
+        import pokedex_store
+        store = pokedex_store.PokedexStore(args.data_dir)
+        store.open()
+    import pokedex_ranking
+    pokedex_ranking.enable_owner_ranking()
+    if args.result_cache > 0:
+        import pokedex_cache
+        pokedex_cache.enable_result_cache(args.result_cache)
+    try:
+        for filename in args.import_files:
+            ok, message = run_batch_import(filename)
+            print(message, file=sys.stderr)
+            if not ok:
+                sys.exit(1)
+        failed = run_main(args)
+        if args.export:
+            import pokedex_import
+            pokedex_import.export_file(args.export)
+    finally:
+        if store is not None:
+            store.close()
+    return failed
+
+
+def run_main(args):
+
+    if args.batch is None:
+        main_menu()
+        return 0
+
+    global LISTING_FORMAT
+    LISTING_FORMAT = args.format
+    # One large write buffer instead of a flush per printed line
+    out = open(sys.stdout.fileno(), "w", buffering=1 << 20, encoding="utf-8", closefd=False)
+    # Keep CSV / JSON-lines output clean of status lines
+    status_out = out if args.format == "text" else sys.stderr
+    try:
+        if args.batch == "-":
+            total, failed = run_batch(sys.stdin, out, quiet=args.quiet, status_out=status_out)
+        else:
+            with open(args.batch, mode='r', encoding='utf-8') as f:
+                total, failed = run_batch(f, out, quiet=args.quiet, status_out=status_out)
+    finally:
+        out.close()
+    return failed
 
 if __name__ == "__main__":
+    # Helper modules do 'import ex7'; make that this running module, not a second copy
+    sys.modules.setdefault("ex7", sys.modules[__name__])
     main()
@@ -0,0 +1,288 @@
+# pokedex_bench.py
+#
+# Benchmarks for the ex7 data structures and workflows.
+#
+#   python pokedex_bench.py                         # 1k, 100k, 1M owners
+#   python pokedex_bench.py --scales 1000 20000 --out before.json
+#   python pokedex_bench.py --scales 1000 20000 --compare before.json
+#
+# Every scenario (scale x insertion order x tree mode) starts from an empty
+# tree built from the same seeded synthetic data, so runs are comparable.
+# Each one runs in a fresh process, so its peak RSS is its own.
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import ex7
+import pokedex_query
+import pokedex_ranking
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def make_owners(count, order, pokes_per_owner, rng):
+    """
+    Returns 'count' synthetic owner nodes with 'pokes_per_owner' random
+    species each, in sorted or random name order.
+    """
+    species = list(ex7.get_catalog()["by_id"].values())
+    names = [f"Trainer{i:08d}" for i in range(count)]
+    if order == "random":
+        rng.shuffle(names)
+    return [ex7.make_owner_node(name, rng.sample(species, min(pokes_per_owner, len(species))))
+            for name in names]
+
+
+def time_calls(fn, args_list):
+    """
+    Calls fn(*args) for each args tuple, timing each call.
+    Returns {"count", "total_s", "ops_per_sec", "p50_us", "p99_us"}.
+    """
+    latencies = []
+    clock = time.perf_counter_ns
+    for args in args_list:
+        start = clock()
+        fn(*args)
+        latencies.append(clock() - start)
+    return summarize(latencies)
+
+
+def summarize(latencies):
+
+    if not latencies:
+        return {"count": 0, "total_s": 0.0, "ops_per_sec": 0.0, "p50_us": 0.0, "p99_us": 0.0}
+    total = sum(latencies)
+    ordered = sorted(latencies)
+    return {
+        "count": len(latencies),
+        "total_s": total / 1e9,
+        "ops_per_sec": len(latencies) / (total / 1e9) if total else 0.0,
+        "p50_us": ordered[len(ordered) // 2] / 1e3,
+        "p99_us": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] / 1e3,
+    }
+
+
+def peak_rss_kb():
+
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def link_chain(owners):
+    """
+    Links the nodes into the right-leaning chain a plain BST builds from
+    sorted input, without recursing, and returns its root.
+    """
+    owners = sorted(owners, key=lambda owner: owner["name"].lower())
+    for owner, successor in zip(owners, owners[1:] + [None]):
+        owner["left"] = None
+        owner["right"] = successor
+    return owners[0] if owners else None
+
+
+def bench_csv(csv_path, repeat):
+
+    return time_calls(ex7.read_hoenn_csv, [(csv_path,)] * repeat)
+
+
+def run_scenario(scale, order, balanced, ops, pokes_per_owner, seed, trace_memory):
+    """Builds one tree and times every operation on it. Returns a result dict."""
+    rng = random.Random(seed)
+    ex7.set_owner_tree_balanced(False)
+    ex7.ownerRoot = None
+    if balanced:
+        ex7.set_owner_tree_balanced(True)
+    pokedex_ranking.disable_owner_ranking()
+
+    owners = make_owners(scale, order, pokes_per_owner, rng)
+    names = [owner["name"] for owner in owners]
+    results = {}
+    errors = {}
+
+    # insert_owner_bst: build the whole tree one insert at a time
+    if trace_memory:
+        tracemalloc.start()
+    root_holder = {"root": None, "inserted": 0}
+
+    def insert(node):
+        root_holder["root"] = ex7.insert_owner_bst(root_holder["root"], node)
+        root_holder["inserted"] += 1
+
+    try:
+        results["insert_owner_bst"] = time_calls(insert, [(owner,) for owner in owners])
+    except RecursionError:
+        # The plain BST degenerates into a list on sorted input. Link that
+        # list directly so everything after the insert is still measured.
+        errors["insert_owner_bst"] = f"RecursionError after {root_holder['inserted']} inserts (degenerate tree)"
+        root_holder["root"] = link_chain(owners)
+    finally:
+        if trace_memory:
+            tree_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    ex7.ownerRoot = root_holder["root"]
+    shape = ex7.check_owner_tree(ex7.ownerRoot)
+    memory = ex7.memory_report(ex7.ownerRoot)
+
+    sample = [rng.choice(names) for _ in range(ops)]
+    results["find_owner_bst"] = time_calls(ex7.find_owner_bst, [(ex7.ownerRoot, name) for name in sample])
+    results["find_owner_bst_miss"] = time_calls(
+        ex7.find_owner_bst, [(ex7.ownerRoot, name + "~") for name in sample])
+
+    # Traversals: one op = one full walk, output thrown away
+    with open(os.devnull, "w") as devnull:
+        for label, walk in (("iter_bfs", ex7.iter_bfs), ("iter_preorder", ex7.iter_preorder),
+                            ("iter_inorder", ex7.iter_inorder), ("iter_postorder", ex7.iter_postorder)):
+            results[label] = time_calls(lambda w=walk: sum(1 for _ in w(ex7.ownerRoot)), [()] * 3)
+        for label, printer in ex7.TRAVERSALS.items():
+            results[f"print_{label}"] = time_calls(printer, [(ex7.ownerRoot, devnull)])
+
+        results["sort_owners_by_num_pokemon"] = time_calls(
+            ex7.sort_owners_by_num_pokemon, [(devnull,)] * 3)
+        ranking = pokedex_ranking.enable_owner_ranking()
+        results["sort_owners_by_num_pokemon_ranked"] = time_calls(
+            ex7.sort_owners_by_num_pokemon, [(devnull,)] * 3)
+        results["ranking_top10"] = time_calls(ranking.top, [(10,)] * ops)
+        pokedex_ranking.disable_owner_ranking()
+
+    # Pokedex operations on random owners
+    targets = [ex7.find_owner_bst(ex7.ownerRoot, name) for name in sample]
+    species_ids = list(ex7.get_catalog()["by_id"])
+    results["add_pokemon_id"] = time_calls(
+        ex7.add_pokemon_id, [(owner, rng.choice(species_ids)) for owner in targets])
+    release_args = [(owner, rng.choice(list(owner["pokedex"]))["Name"]) for owner in targets if owner["pokedex"]]
+    results["release_pokemon_name"] = time_calls(ex7.release_pokemon_name, release_args)
+    evolve_args = [(owner, rng.choice(list(owner["pokedex"]))["Name"]) for owner in targets if owner["pokedex"]]
+    results["evolve_pokemon_name"] = time_calls(ex7.evolve_pokemon_name, evolve_args)
+
+    # Filter paths
+    filters = [("type", "water"), ("evolvable", None), ("attack", 60), ("hp", 60), ("prefix", "s"), ("all", None)]
+    for kind, value in filters:
+        results[f"filter_pokedex_{kind}"] = time_calls(
+            ex7.filter_pokedex, [(owner["pokedex"], kind, value) for owner in targets])
+    conditions, sort, limit = pokedex_query.parse_query(["type=water", "attack>60", "evolvable"])
+    results["query_owner"] = time_calls(
+        lambda owner: list(pokedex_query.query_owner(owner, conditions)), [(owner,) for owner in targets])
+    results["query_all_owners_limit10"] = time_calls(
+        lambda: list(pokedex_query.query_all_owners(ex7.ownerRoot, conditions, limit=10)), [()] * 10)
+
+    # delete_owner_bst last, since it tears the tree down
+    doomed = rng.sample(names, min(ops, len(names)))
+
+    def delete(name):
+        ex7.ownerRoot = ex7.delete_owner_bst(ex7.ownerRoot, name)
+
+    try:
+        results["delete_owner_bst"] = time_calls(delete, [(name,) for name in doomed])
+    except RecursionError:
+        errors["delete_owner_bst"] = "RecursionError (degenerate tree)"
+
+    result = {
+        "scale": scale,
+        "order": order,
+        "balanced": balanced,
+        "tree_height": shape["height"],
+        "memory": memory,
+        "ops": results,
+        "errors": errors,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+    if trace_memory:
+        result["tree_build_peak_bytes"] = tree_peak
+    ex7.ownerRoot = None
+    return result
+
+
+def run_scenario_isolated(*args):
+    """run_scenario in a fresh process, so ru_maxrss is this scenario's peak alone."""
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(run_scenario, args)
+
+
+def print_results(report, baseline=None):
+
+    previous = {}
+    if baseline:
+        for scenario in baseline["scenarios"]:
+            previous[(scenario["scale"], scenario["order"], scenario["balanced"])] = scenario.get("ops", {})
+    for scenario in report["scenarios"]:
+        mode = "balanced" if scenario["balanced"] else "plain"
+        print(f"\n== {scenario['scale']} owners, {scenario['order']} order, {mode} tree ==")
+        print(f"  height {scenario['tree_height']}, peak RSS {scenario['peak_rss_kb']} KiB")
+        memory = scenario["memory"]
+        print(f"  bytes/owner {memory['bytes_per_owner']['current']:.0f}"
+              f" (legacy {memory['bytes_per_owner']['legacy']:.0f}),"
+              f" bytes/owned Pokemon {memory['bytes_per_owned_pokemon']['current']:.0f}"
+              f" (legacy {memory['bytes_per_owned_pokemon']['legacy']:.0f})")
+        old_ops = previous.get((scenario["scale"], scenario["order"], scenario["balanced"]), {})
+        for name, stats in scenario["ops"].items():
+            line = (f"  {name:38} {stats['ops_per_sec']:>12.1f} ops/s"
+                    f"  p50 {stats['p50_us']:>10.1f}us  p99 {stats['p99_us']:>10.1f}us")
+            if name in old_ops and old_ops[name]["ops_per_sec"]:
+                line += f"  x{stats['ops_per_sec'] / old_ops[name]['ops_per_sec']:.2f}"
+            print(line)
+        for name, error in scenario.get("errors", {}).items():
+            print(f"  {name:38} failed: {error}")
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Benchmark the ex7 owner tree and pokedex operations.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 100000, 1000000],
+                        help="numbers of owners to benchmark (default: 1000 100000 1000000)")
+    parser.add_argument("--orders", nargs="+", choices=["sorted", "random"], default=["sorted", "random"])
+    parser.add_argument("--trees", nargs="+", choices=["plain", "balanced"], default=["plain", "balanced"])
+    parser.add_argument("--ops", type=int, default=2000, help="operations sampled per timed step")
+    parser.add_argument("--pokes-per-owner", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="also trace Python allocations while building the tree (slow)")
+    parser.add_argument("--out", default="bench_results.json", help="where to save the JSON report")
+    parser.add_argument("--compare", metavar="JSON", help="earlier report to show speedups against")
+    args = parser.parse_args(argv)
+
+    csv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hoenn_pokedex.csv")
+    report = {
+        "meta": {
+            "python": sys.version,
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": vars(args),
+        },
+        "read_hoenn_csv": bench_csv(csv_path, 50),
+        "scenarios": [],
+    }
+    for scale in args.scales:
+        for order in args.orders:
+            for tree in args.trees:
+                report["scenarios"].append(run_scenario_isolated(
+                    scale, order, tree == "balanced", args.ops, args.pokes_per_owner,
+                    args.seed, args.tracemalloc))
+                print(f"done: {scale} {order} {tree}", file=sys.stderr)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, mode='r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    stats = report["read_hoenn_csv"]
+    print(f"read_hoenn_csv: {stats['ops_per_sec']:.1f} ops/s, p50 {stats['p50_us']:.1f}us")
+    print_results(report, baseline)
+    with open(args.out, mode='w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# pokedex_cache.py
+
+import threading
+from collections import OrderedDict
+from itertools import count
+
+import ex7
+
+
+class ResultCache:
+    """
+    A bounded LRU of filter / query / ranking results.
+
+    Every entry is stored with the version of the owner it was computed
+    from (or the global version, for results over all owners such as the
+    ranking). Mutation events give the owner involved a new version number,
+    and any event at all gives the global scope one, so a stale entry is
+    recognized on its next lookup and recomputed. Nothing is scanned or
+    invalidated eagerly. Version numbers come from one counter and are
+    never reused, so a deleted and re-created owner can't match old entries.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # (scope, key) -> (version, result)
+        self._versions = {}  # lower-cased owner name -> version
+        self._stamps = count(1)
+        self._global_version = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def version(self, scope):
+
+        if scope is None:
+            return self._global_version
+        return self._versions.get(scope, 0)
+
+    def get_or_compute(self, owner_name, key, compute):
+        """
+        Returns the cached result of compute() for 'key' on owner_name
+        (None: over all owners), computing and storing it on a miss.
+        Results are shared between callers, so don't modify them.
+        """
+        scope = None if owner_name is None else owner_name.strip().lower()
+        entry_key = (scope, key)
+        with self._lock:
+            version = self.version(scope)
+            entry = self._entries.get(entry_key)
+            if entry is not None:
+                if entry[0] == version:
+                    self._entries.move_to_end(entry_key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[entry_key]
+                self.invalidations += 1
+            self.misses += 1
+
+        result = compute()
+        with self._lock:
+            # Store only if nothing changed while computing
+            if self.version(scope) == version:
+                self._entries[entry_key] = (version, result)
+                self._entries.move_to_end(entry_key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def on_mutation(self, event, owner_node, detail):
+
+        with self._lock:
+            self._global_version = next(self._stamps)
+            if event == "reset":
+                self._entries.clear()
+                self._versions.clear()
+            else:
+                self._versions[owner_node["name"].lower()] = next(self._stamps)
+
+    def clear(self):
+
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"entries": len(self._entries), "maxsize": self.maxsize,
+                    "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / lookups if lookups else 0.0,
+                    "evictions": self.evictions, "invalidations": self.invalidations}
+
+
+def enable_result_cache(maxsize=1024):
+    """
+    Creates a ResultCache, subscribes it to mutation events and makes ex7's
+    filters, single-owner queries and the by-size ranking go through it.
+    Returns the cache (the existing one if already enabled).
+    """
+    if ex7.RESULT_CACHE is None:
+        cache = ResultCache(maxsize)
+        ex7.add_mutation_listener(cache.on_mutation)
+        ex7.RESULT_CACHE = cache
+    return ex7.RESULT_CACHE
+
+
+def disable_result_cache():
+
+    if ex7.RESULT_CACHE is not None:
+        ex7.remove_mutation_listener(ex7.RESULT_CACHE.on_mutation)
+        ex7.RESULT_CACHE = None
@@ -0,0 +1,128 @@
+# pokedex_columns.py
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; only this module needs it
+    np = None
+
+import ex7
+
+
+class SpeciesColumns:
+    """
+    A columnar copy of the species catalog: one NumPy array per field
+    instead of one dict per species. Rows are in catalog order.
+      ids, hp, attack  int32 arrays
+      type_codes       int16 array, indexing into type_names
+      can_evolve       bool array
+      names            list of str (not needed by the vectorized paths)
+    Every filter / aggregate takes an optional 'rows' array (see
+    rows_for_ids / owner_rows) to restrict it to some species, e.g. the ones
+    an owner holds, and runs as whole-array operations in one pass.
+    """
+
+    def __init__(self, data_list):
+        if np is None:
+            raise ImportError("SpeciesColumns needs NumPy (pip install numpy).")
+        self.type_names = sorted({poke["Type"] for poke in data_list})
+        type_code = {type_name: code for code, type_name in enumerate(self.type_names)}
+        self.ids = np.fromiter((poke["ID"] for poke in data_list), dtype=np.int32, count=len(data_list))
+        self.hp = np.fromiter((poke["HP"] for poke in data_list), dtype=np.int32, count=len(data_list))
+        self.attack = np.fromiter((poke["Attack"] for poke in data_list), dtype=np.int32, count=len(data_list))
+        self.type_codes = np.fromiter((type_code[poke["Type"]] for poke in data_list),
+                                      dtype=np.int16, count=len(data_list))
+        self.can_evolve = np.fromiter((poke["Can Evolve"] == "TRUE" for poke in data_list),
+                                      dtype=bool, count=len(data_list))
+        self.names = [poke["Name"] for poke in data_list]
+        # ID -> row lookup table; -1 marks IDs that aren't in the catalog
+        self._row_of_id = np.full(int(self.ids.max(initial=0)) + 1, -1, dtype=np.int32)
+        # Reversed, so the first row wins for a duplicated ID, like the catalog
+        self._row_of_id[self.ids[::-1]] = np.arange(len(self.ids) - 1, -1, -1, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def type_code(self, poke_type):
+        """Returns the code of a type name (case-insensitive), or -1 if unknown."""
+        poke_type = poke_type.strip().lower()
+        for code, type_name in enumerate(self.type_names):
+            if type_name.lower() == poke_type:
+                return code
+        return -1
+
+    def rows_for_ids(self, poke_ids):
+        """Maps an iterable of species IDs to row numbers, dropping unknown IDs."""
+        poke_ids = np.fromiter(poke_ids, dtype=np.int64)
+        poke_ids = poke_ids[(poke_ids >= 0) & (poke_ids < len(self._row_of_id))]
+        rows = self._row_of_id[poke_ids]
+        return rows[rows >= 0]
+
+    def owner_rows(self, owner_node):
+        """Row numbers of the species in one owner's pokedex."""
+        return self.rows_for_ids(poke["ID"] for poke in owner_node["pokedex"])
+
+    def mask(self, poke_type=None, evolvable=None, attack_above=None, hp_above=None, rows=None):
+        """
+        Boolean mask over all species (or over 'rows', aligned with it) for
+        the given filters, ANDed together. Thresholds are strictly-above, like
+        the display filter menu.
+        """
+        index = slice(None) if rows is None else rows
+        result = np.ones(len(self.ids) if rows is None else len(rows), dtype=bool)
+        if poke_type is not None:
+            result &= self.type_codes[index] == self.type_code(poke_type)
+        if evolvable is not None:
+            result &= self.can_evolve[index] == bool(evolvable)
+        if attack_above is not None:
+            result &= self.attack[index] > attack_above
+        if hp_above is not None:
+            result &= self.hp[index] > hp_above
+        return result
+
+    def filter_ids(self, rows=None, **filters):
+        """IDs of the species that pass mask(**filters), in row order."""
+        ids = self.ids if rows is None else self.ids[rows]
+        return ids[self.mask(rows=rows, **filters)]
+
+    def count(self, rows=None, **filters):
+        """How many species pass mask(**filters), e.g. count(hp_above=60)."""
+        return int(np.count_nonzero(self.mask(rows=rows, **filters)))
+
+    def type_stats(self, rows=None):
+        """
+        Per-type aggregates in one pass over the columns:
+          { type name: {"count": n, "mean_attack": float, "max_attack": int,
+                        "mean_hp": float, "max_hp": int}, ... }
+        Types with no species in 'rows' are left out.
+        """
+        index = slice(None) if rows is None else rows
+        codes = self.type_codes[index].astype(np.intp)
+        attack = self.attack[index]
+        hp = self.hp[index]
+        num_types = len(self.type_names)
+        counts = np.bincount(codes, minlength=num_types)
+        attack_sum = np.bincount(codes, weights=attack, minlength=num_types)
+        hp_sum = np.bincount(codes, weights=hp, minlength=num_types)
+        attack_max = np.zeros(num_types, dtype=np.int32)
+        hp_max = np.zeros(num_types, dtype=np.int32)
+        np.maximum.at(attack_max, codes, attack)
+        np.maximum.at(hp_max, codes, hp)
+        stats = {}
+        for code in np.flatnonzero(counts):
+            stats[self.type_names[code]] = {
+                "count": int(counts[code]),
+                "mean_attack": float(attack_sum[code] / counts[code]),
+                "max_attack": int(attack_max[code]),
+                "mean_hp": float(hp_sum[code] / counts[code]),
+                "max_hp": int(hp_max[code]),
+            }
+        return stats
+
+    def hp_histogram(self, bins=10, rows=None):
+        """Returns (counts, bin_edges) of HP, as numpy.histogram does."""
+        return np.histogram(self.hp if rows is None else self.hp[rows], bins=bins)
+
+
+def catalog_columns():
+    """Builds SpeciesColumns for the species currently loaded in ex7."""
+    return SpeciesColumns(ex7.get_hoenn_data())
@@ -1,93 +1,565 @@
-# pokedex_gui.py
-
-import tkinter as tk
-from PIL import Image, ImageTk
-import os
-
-
-def show_Pokedex_GUI(pokeList):
-    """
-    Display each Pokemon in a simple Tkinter window with its Name, Type, HP,
-    Attack, and optionally an image from the 'pokemons' folder.
-    We allow horizontal resizing so each Pokemon 'frame' expands in width.
-    """
-    root = tk.Tk()
-    root.title("My Pokedex GUI")
-
-    # Create a canvas and a vertical scrollbar
-    canvas = tk.Canvas(root)
-    scrollbar = tk.Scrollbar(root, orient="vertical", command=canvas.yview)
-    canvas.configure(yscrollcommand=scrollbar.set)
-
-    # This 'scrollable_frame' is where we'll place each Pokemon frame.
-    scrollable_frame = tk.Frame(canvas)
-
-    # A callback to update the scrollregion whenever 'scrollable_frame' changes size
-    def on_frame_configure(event):
-        canvas.configure(scrollregion=canvas.bbox("all"))
-
-    scrollable_frame.bind("<Configure>", on_frame_configure)
-
-    # Actually place 'scrollable_frame' in the canvas
-    # We'll store the canvas window ID so we can update its width on resize
-    canvas_window = canvas.create_window(
-        (0, 0), window=scrollable_frame, anchor="nw")
-
-    # A callback to keep the scrollable_frame the same width as the canvas
-    def on_canvas_configure(event):
-        # Set the scrollable_frame width to match canvas' width
-        canvas.itemconfig(canvas_window, width=event.width)
-
-    canvas.bind("<Configure>", on_canvas_configure)
-
-    # Mouse wheel handling
-    def on_mouse_wheel(event):
-        # On Windows/macOS: event.delta is typically ±120 per wheel step
-        canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-
-    canvas.bind_all("<MouseWheel>", on_mouse_wheel)  # Windows/macOS
-    # For Linux (buttons 4=up, 5=down):
-    canvas.bind_all("<Button-4>", lambda e: canvas.yview_scroll(-1, "units"))
-    canvas.bind_all("<Button-5>", lambda e: canvas.yview_scroll(1, "units"))
-
-    # Pack the canvas and scrollbar
-    canvas.pack(side="left", fill="both", expand=True)
-    scrollbar.pack(side="right", fill="y")
-
-    if not pokeList:
-        msg = tk.Label(scrollable_frame, text="No Pokemon in this Pokedex!")
-        msg.pack(padx=10, pady=10)
-    else:
-        for poke in pokeList:
-            # Create a frame for each Pokémon, fill horizontally, expand so it can grow
-            frame = tk.Frame(scrollable_frame, bd=2,
-                             relief='groove', padx=5, pady=5)
-            frame.pack(side="top", fill="x", expand=True, padx=10, pady=5)
-
-            # Pokemon text info
-            info = (
-                f"ID: {poke['ID']} | "
-                f"Name: {poke['Name']} | "
-                f"Type: {poke['Type']} | "
-                f"HP: {poke['HP']} | "
-                f"Attack: {poke['Attack']} | "
-                f"Can Evolve: {poke['Can Evolve']}"
-            )
-            # The text label also fills horizontally and expands
-            label = tk.Label(frame, text=info, anchor="w")
-            label.pack(side="left", fill="x", expand=True)
-
-            image_path = os.path.join("pokemons", f"{poke['ID'] + 251}.png")
-            if os.path.exists(image_path):
-                try:
-                    img = Image.open(image_path)
-                    img = img.resize((80, 80), Image.ANTIALIAS)
-                    photo = ImageTk.PhotoImage(img)
-                    picLabel = tk.Label(frame, image=photo)
-                    picLabel.photo = photo  # keep reference
-                    picLabel.pack(side="right", padx=5)
-                except Exception as e:
-                    print(f"Error loading image {image_path}: {e}")
-                    # If error, we'll ignore and just not show the image
-
-    root.mainloop()
+# pokedex_gui.py
+
+import tkinter as tk
+from PIL import Image, ImageTk
+import argparse
+import csv
+import json
+import mmap
+import os
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import ex7
+
+POKEMON_IMAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pokemons")
+# Which sprite file belongs to which Pokemon ID (columns: ID, File)
+SPRITE_INDEX_PATH = os.path.join(POKEMON_IMAGE_DIR, "sprites.csv")
+# Resized copies of the sprites, so each one is only resized once
+THUMB_CACHE_DIR = os.path.join(POKEMON_IMAGE_DIR, ".thumbs")
+THUMB_SIZE = (80, 80)
+# Image.ANTIALIAS was removed in Pillow 10; it was another name for LANCZOS
+RESAMPLE = getattr(Image, "Resampling", Image).LANCZOS
+# Lists longer than this open in the virtualized view
+VIRTUAL_LIST_THRESHOLD = 200
+# Fixed row height of the virtualized view (thumbnail + frame padding)
+ROW_HEIGHT = THUMB_SIZE[1] + 20
+
+
+def read_sprite_index(filename=SPRITE_INDEX_PATH):
+
+    # {ID: sprite file name}; no index means no sprites
+    try:
+        with open(filename, mode='r', encoding='utf-8', newline='') as f:
+            return {int(row["ID"]): row["File"].strip() for row in csv.DictReader(f)}
+    except FileNotFoundError:
+        return {}
+
+
+_sprite_files = None
+
+
+def sprite_files():
+
+    global _sprite_files
+    if _sprite_files is None:
+        _sprite_files = read_sprite_index()
+    return _sprite_files
+
+
+def sprite_path(poke_id):
+
+    file_name = sprite_files().get(poke_id)
+    return None if file_name is None else os.path.join(POKEMON_IMAGE_DIR, file_name)
+
+
+def available_sprites():
+
+    return set(sprite_files())
+
+
+def thumbnail_cache_path(poke_id, size=THUMB_SIZE):
+
+    return os.path.join(THUMB_CACHE_DIR, f"{poke_id}_{size[0]}x{size[1]}.png")
+
+
+def load_thumbnail(poke_id, size=THUMB_SIZE):
+    """
+    Returns the sprite for poke_id resized to 'size', as a loaded RGBA PIL
+    image, or None when it has no (readable) sprite. Safe to call from
+    worker threads. The on-disk thumbnail is used when it is newer than the
+    sprite; otherwise the sprite is resized and the thumbnail rewritten.
+    """
+    image_path = sprite_path(poke_id)
+    if image_path is None:
+        return None
+    try:
+        source_mtime = os.stat(image_path).st_mtime
+    except FileNotFoundError:
+        return None
+    cached_path = thumbnail_cache_path(poke_id, size)
+    try:
+        if os.stat(cached_path).st_mtime >= source_mtime:
+            with Image.open(cached_path) as img:
+                return img.convert("RGBA")
+    except OSError:
+        pass  # Missing or unreadable thumbnail: rebuild it
+
+    try:
+        with Image.open(image_path) as img:
+            thumb = img.convert("RGBA").resize(size, RESAMPLE)
+    except Exception as e:
+        print(f"Error loading image {image_path}: {e}")
+        return None
+    try:
+        os.makedirs(THUMB_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{cached_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        thumb.save(tmp_path, "PNG")
+        os.replace(tmp_path, cached_path)
+    except OSError:
+        pass  # A read-only folder only costs the resize next time
+    return thumb
+
+
+########################
+# Sprite atlas
+########################
+
+# build_sprite_atlas packs every sprite, resized, into one raw RGBA file
+# with a JSON index of byte offsets; SpriteAtlas maps that file into memory
+# and hands out images that share the mapped bytes, so showing a sprite
+# needs no file open, PNG decode or resize.
+
+def atlas_paths(size=THUMB_SIZE):
+
+    base = os.path.join(THUMB_CACHE_DIR, f"atlas_{size[0]}x{size[1]}")
+    return base + ".rgba", base + ".json"
+
+
+def sprite_sources_stamp():
+
+    # Two stats, not one per sprite: the index's mtime and size, and the
+    # sprite folder's mtime, which moves when a sprite is added, removed or
+    # replaced by a new file. Sprites rewritten in place need --build-atlas.
+    index_stat = os.stat(SPRITE_INDEX_PATH)
+    return [index_stat.st_mtime_ns, index_stat.st_size, os.stat(POKEMON_IMAGE_DIR).st_mtime_ns]
+
+
+def build_sprite_atlas(size=THUMB_SIZE):
+    """
+    Writes the atlas for 'size' (see atlas_paths) and returns the number of
+    sprites in it. Sprites go through load_thumbnail, so thumbnails already
+    on disk are reused.
+    """
+    blob_path, index_path = atlas_paths(size)
+    os.makedirs(THUMB_CACHE_DIR, exist_ok=True)
+    # Taken before reading the sprites, so a change made meanwhile still shows as stale
+    sources = sprite_sources_stamp()
+    offsets = {}
+    offset = 0
+    with open(blob_path + ".tmp", mode='wb') as f:
+        for poke_id in sorted(sprite_files()):
+            img = load_thumbnail(poke_id, size)
+            if img is None:
+                continue
+            data = img.tobytes()
+            f.write(data)
+            offsets[str(poke_id)] = offset
+            offset += len(data)
+    index = {"size": list(size), "mode": "RGBA", "sources": sources, "sprites": offsets}
+    with open(index_path + ".tmp", mode='w', encoding='utf-8') as f:
+        json.dump(index, f)
+    os.replace(blob_path + ".tmp", blob_path)
+    os.replace(index_path + ".tmp", index_path)
+    return len(offsets)
+
+
+class SpriteAtlas:
+    """A memory-mapped atlas: image(poke_id) slices one sprite out without copying."""
+
+    def __init__(self, blob_path, index):
+        self.size = tuple(index["size"])
+        self.offsets = {int(poke_id): offset for poke_id, offset in index["sprites"].items()}
+        self._sprite_bytes = self.size[0] * self.size[1] * 4
+        with open(blob_path, mode='rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+    def __contains__(self, poke_id):
+        return poke_id in self.offsets
+
+    def image(self, poke_id):
+
+        offset = self.offsets.get(poke_id)
+        if offset is None:
+            return None
+        data = self._view[offset:offset + self._sprite_bytes]
+        return Image.frombuffer("RGBA", self.size, data, "raw", "RGBA", 0, 1)
+
+
+def open_sprite_atlas(size=THUMB_SIZE):
+    """
+    Returns the SpriteAtlas for 'size', or None when it hasn't been built
+    or the sprites changed since (the caller then falls back to thumbnails).
+    Checking costs two os.stat calls, see sprite_sources_stamp.
+    """
+    blob_path, index_path = atlas_paths(size)
+    try:
+        with open(index_path, mode='r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index["sources"] != sprite_sources_stamp() or tuple(index["size"]) != tuple(size):
+            return None
+        return SpriteAtlas(blob_path, index)
+    except (OSError, ValueError, KeyError):
+        return None
+
+########################
+# Thumbnail loading
+########################
+
+class LruCache:
+    """A small thread-safe mapping that drops the least recently used entries."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class ThumbnailLoader:
+    """
+    Decodes thumbnails on a thread pool and turns them into PhotoImages on
+    the Tk thread. request(poke_id, callback) calls callback(photo) on the
+    Tk thread: at once when the PhotoImage is in the LRU or the sprite is
+    in 'atlas' (a SpriteAtlas of the same size), otherwise when its worker
+    finishes. Pokemon without a sprite never call back.
+    PhotoImages belong to one Tk root, so a loader lives as long as its window.
+    """
+
+    def __init__(self, root, size=THUMB_SIZE, workers=4, max_photos=512, poll_ms=25, atlas=None):
+        self.root = root
+        self.size = size
+        self.atlas = atlas if atlas is not None and atlas.size == tuple(size) else None
+        self.photos = LruCache(max_photos)
+        self.poll_ms = poll_ms
+        self._pending = {}  # poke_id -> callbacks waiting for it
+        self._done = queue.SimpleQueue()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnails")
+        self._polling = False
+
+    def request(self, poke_id, callback):
+
+        photo = self.photos.get(poke_id)
+        if photo is None and self.atlas is not None and poke_id in self.atlas:
+            photo = ImageTk.PhotoImage(self.atlas.image(poke_id), master=self.root)
+            self.photos.put(poke_id, photo)
+        if photo is not None:
+            callback(photo)
+            return
+        if poke_id in self._pending:
+            self._pending[poke_id].append(callback)
+            return
+        self._pending[poke_id] = [callback]
+        future = self._executor.submit(load_thumbnail, poke_id, self.size)
+        future.add_done_callback(lambda done, poke_id=poke_id: self._done.put((poke_id, done)))
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def cancel(self, poke_id):
+        """Forgets the callbacks waiting for poke_id (the decode itself still finishes)."""
+        if poke_id in self._pending:
+            self._pending[poke_id] = []
+
+    def _poll(self):
+        # Runs on the Tk thread: PhotoImages can't be made anywhere else
+        while True:
+            try:
+                poke_id, future = self._done.get_nowait()
+            except queue.Empty:
+                break
+            callbacks = self._pending.pop(poke_id, [])
+            img = None if future.cancelled() else future.result()
+            if img is None:
+                continue
+            photo = ImageTk.PhotoImage(img, master=self.root)
+            self.photos.put(poke_id, photo)
+            for callback in callbacks:
+                callback(photo)
+        if self._pending:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def close(self):
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._pending.clear()
+
+
+def poke_info(poke, owner_name=None):
+
+    info = (
+        f"ID: {poke['ID']} | "
+        f"Name: {poke['Name']} | "
+        f"Type: {poke['Type']} | "
+        f"HP: {poke['HP']} | "
+        f"Attack: {poke['Attack']} | "
+        f"Can Evolve: {poke['Can Evolve']}"
+    )
+    return info if owner_name is None else f"Owner: {owner_name} | {info}"
+
+
+class VirtualPokedexList:
+    """
+    A scrolling list of (owner name or None, poke) rows that only has
+    widgets for the rows in view. Rows have a fixed height, so the visible
+    slice is computed from the scroll offset; the row widgets are reused as
+    it moves, and only visible rows ask the loader for their image.
+    A filter bar above the list runs ex7.filter_pokedex over the rows.
+    """
+
+    def __init__(self, master, rows, loader):
+        self.loader = loader
+        self.all_rows = rows
+        self.rows = rows
+        self.sprite_ids = available_sprites()
+        self.placeholder = tk.PhotoImage(master=master, width=THUMB_SIZE[0], height=THUMB_SIZE[1])
+        self.slots = []
+
+        bar = tk.Frame(master)
+        bar.pack(side="top", fill="x", padx=10, pady=5)
+        self.kind_var = tk.StringVar(master, value="all")
+        tk.OptionMenu(bar, self.kind_var, *ex7.FILTER_KINDS).pack(side="left")
+        self.value_entry = tk.Entry(bar)
+        self.value_entry.pack(side="left", fill="x", expand=True, padx=5)
+        self.value_entry.bind("<Return>", lambda event: self.apply_filter())
+        tk.Button(bar, text="Filter", command=self.apply_filter).pack(side="left")
+        self.status = tk.Label(bar, anchor="e")
+        self.status.pack(side="left", padx=5)
+
+        self.canvas = tk.Canvas(master, yscrollincrement=ROW_HEIGHT // 4)
+        scrollbar = tk.Scrollbar(master, orient="vertical", command=self.yview)
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        self.canvas.bind("<Configure>", self.refresh)
+        self.canvas.bind_all("<MouseWheel>", lambda event: self.yview("scroll", int(-1*(event.delta/120)), "units"))
+        self.canvas.bind_all("<Button-4>", lambda event: self.yview("scroll", -1, "units"))
+        self.canvas.bind_all("<Button-5>", lambda event: self.yview("scroll", 1, "units"))
+        self.set_rows(rows)
+
+    def yview(self, *args):
+
+        self.canvas.yview(*args)
+        self.refresh()
+
+    def set_rows(self, rows):
+
+        self.rows = rows
+        self.canvas.configure(scrollregion=(0, 0, 0, len(rows) * ROW_HEIGHT))
+        self.canvas.yview_moveto(0)
+        self.status.configure(text=f"{len(rows)} of {len(self.all_rows)}")
+        self.refresh()
+
+    def apply_filter(self):
+
+        kind = self.kind_var.get()
+        value = self.value_entry.get().strip() or None
+        problem = ex7.check_filter(kind, value)
+        if problem:
+            self.status.configure(text=problem)
+            return
+        # Rows share species records, so filter the distinct species once
+        species = {poke["ID"]: poke for _, poke in self.all_rows}
+        matched = {poke["ID"] for poke in ex7.filter_pokedex(species.values(), kind, value)}
+        self.set_rows([row for row in self.all_rows if row[1]["ID"] in matched])
+
+    def _make_slot(self):
+
+        frame = tk.Frame(self.canvas, bd=2, relief='groove', padx=5, pady=5)
+        label = tk.Label(frame, anchor="w")
+        label.pack(side="left", fill="x", expand=True)
+        pic_label = tk.Label(frame, image=self.placeholder)
+        pic_label.pack(side="right", padx=5)
+        window = self.canvas.create_window((0, 0), window=frame, anchor="nw", state="hidden")
+        return {"frame": frame, "label": label, "pic": pic_label, "window": window, "row": None}
+
+    def refresh(self, event=None):
+        # Lay the slots over the rows in view, filling only the ones that moved
+        height = self.canvas.winfo_height()
+        width = self.canvas.winfo_width()
+        needed = height // ROW_HEIGHT + 2
+        while len(self.slots) < needed:
+            self.slots.append(self._make_slot())
+        first = max(0, int(self.canvas.canvasy(0)) // ROW_HEIGHT)
+        for offset, slot in enumerate(self.slots):
+            index = first + offset
+            if offset >= needed or index >= len(self.rows):
+                self.canvas.itemconfigure(slot["window"], state="hidden")
+                slot["row"] = None
+                continue
+            self.canvas.coords(slot["window"], 10, index * ROW_HEIGHT + 5)
+            self.canvas.itemconfigure(slot["window"], state="normal",
+                                      width=max(width - 20, 1), height=ROW_HEIGHT - 10)
+            row = self.rows[index]
+            if slot["row"] is row:
+                continue
+            self._fill_slot(slot, row)
+
+    def _fill_slot(self, slot, row):
+
+        owner_name, poke = row
+        slot["row"] = row
+        slot["label"].configure(text=poke_info(poke, owner_name))
+        slot["pic"].configure(image=self.placeholder)
+        slot["pic"].photo = None
+        if poke["ID"] not in self.sprite_ids:
+            return
+
+        def show_image(photo):
+            # The slot may show another row by the time the image is ready
+            if slot["row"] is row:
+                slot["pic"].configure(image=photo)
+                slot["pic"].photo = photo
+        self.loader.request(poke["ID"], show_image)
+
+
+def show_virtual_GUI(rows, title="My Pokedex GUI"):
+    """
+    Opens a window with a VirtualPokedexList of 'rows', a list of
+    (owner name or None, poke).
+    """
+    root = tk.Tk()
+    root.title(title)
+    loader = ThumbnailLoader(root, atlas=open_sprite_atlas())
+
+    def on_close():
+        loader.close()
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
+    if not rows:
+        tk.Label(root, text="No Pokemon in this Pokedex!").pack(padx=10, pady=10)
+    else:
+        VirtualPokedexList(root, rows, loader)
+    root.mainloop()
+
+
+def show_all_owners_GUI(root=None):
+    """One virtualized list with every owned Pokemon, owners in name order."""
+    rows = [(owner['name'], poke)
+            for owner in ex7.iter_inorder(ex7.ownerRoot if root is None else root)
+            for poke in owner['pokedex']]
+    show_virtual_GUI(rows, title="All Owners")
+
+
+def show_Pokedex_GUI(pokeList, virtual=None):
+    """
+    Display each Pokemon in a simple Tkinter window with its Name, Type, HP,
+    Attack, and optionally an image from the 'pokemons' folder.
+    We allow horizontal resizing so each Pokemon 'frame' expands in width.
+    The window shows up right away; images are decoded in the background
+    and fill in as they arrive.
+    Lists longer than VIRTUAL_LIST_THRESHOLD (or any list, with
+    virtual=True) open in the virtualized view instead.
+    """
+    if virtual or (virtual is None and len(pokeList) > VIRTUAL_LIST_THRESHOLD):
+        show_virtual_GUI([(None, poke) for poke in pokeList])
+        return
+    root = tk.Tk()
+    root.title("My Pokedex GUI")
+    loader = ThumbnailLoader(root, atlas=open_sprite_atlas())
+
+    def on_close():
+        loader.close()
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
+
+    # Create a canvas and a vertical scrollbar
+    canvas = tk.Canvas(root)
+    scrollbar = tk.Scrollbar(root, orient="vertical", command=canvas.yview)
+    canvas.configure(yscrollcommand=scrollbar.set)
+
+    # This 'scrollable_frame' is where we'll place each Pokemon frame.
+    scrollable_frame = tk.Frame(canvas)
+
+    # A callback to update the scrollregion whenever 'scrollable_frame' changes size
+    def on_frame_configure(event):
+        canvas.configure(scrollregion=canvas.bbox("all"))
+
+    scrollable_frame.bind("<Configure>", on_frame_configure)
+
+    # Actually place 'scrollable_frame' in the canvas
+    # We'll store the canvas window ID so we can update its width on resize
+    canvas_window = canvas.create_window(
+        (0, 0), window=scrollable_frame, anchor="nw")
+
+    # A callback to keep the scrollable_frame the same width as the canvas
+    def on_canvas_configure(event):
+        # Set the scrollable_frame width to match canvas' width
+        canvas.itemconfig(canvas_window, width=event.width)
+
+    canvas.bind("<Configure>", on_canvas_configure)
+
+    # Mouse wheel handling
+    def on_mouse_wheel(event):
+        # On Windows/macOS: event.delta is typically ±120 per wheel step
+        canvas.yview_scroll(int(-1*(event.delta/120)), "units")
+
+    canvas.bind_all("<MouseWheel>", on_mouse_wheel)  # Windows/macOS
+    # For Linux (buttons 4=up, 5=down):
+    canvas.bind_all("<Button-4>", lambda e: canvas.yview_scroll(-1, "units"))
+    canvas.bind_all("<Button-5>", lambda e: canvas.yview_scroll(1, "units"))
+
+    # Pack the canvas and scrollbar
+    canvas.pack(side="left", fill="both", expand=True)
+    scrollbar.pack(side="right", fill="y")
+
+    if not pokeList:
+        msg = tk.Label(scrollable_frame, text="No Pokemon in this Pokedex!")
+        msg.pack(padx=10, pady=10)
+    else:
+        sprite_ids = available_sprites()
+        # Blank stand-in, so rows don't change height as the images arrive
+        placeholder = tk.PhotoImage(master=root, width=THUMB_SIZE[0], height=THUMB_SIZE[1])
+        for poke in pokeList:
+            # Create a frame for each Pokémon, fill horizontally, expand so it can grow
+            frame = tk.Frame(scrollable_frame, bd=2,
+                             relief='groove', padx=5, pady=5)
+            frame.pack(side="top", fill="x", expand=True, padx=10, pady=5)
+
+            # The text label also fills horizontally and expands
+            label = tk.Label(frame, text=poke_info(poke), anchor="w")
+            label.pack(side="left", fill="x", expand=True)
+
+            if poke['ID'] in sprite_ids:
+                picLabel = tk.Label(frame, image=placeholder)
+                picLabel.pack(side="right", padx=5)
+
+                def show_image(photo, picLabel=picLabel):
+                    picLabel.configure(image=photo)
+                    picLabel.photo = photo  # keep reference
+                loader.request(poke['ID'], show_image)
+
+    root.mainloop()
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Pokedex GUI helpers.")
+    parser.add_argument("--build-atlas", action="store_true",
+                        help="pack the resized sprites into the memory-mapped atlas the GUI reads")
+    parser.add_argument("--size", type=int, default=THUMB_SIZE[0], help="sprite edge in pixels")
+    args = parser.parse_args(argv)
+    if args.build_atlas:
+        count = build_sprite_atlas((args.size, args.size))
+        print(f"Packed {count} sprites into {atlas_paths((args.size, args.size))[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# pokedex_import.py
+#
+# Bulk import and export of owners and their Pokedexes.
+#
+# Import reads either format as a stream:
+#   CSV       an "Owner" column plus an "ID" column (one row per owned
+#             Pokemon, an empty ID for an empty Pokedex; consecutive rows of
+#             one owner make one record) or a "Pokedex" column of IDs
+#             separated by spaces or ';'. Other columns are ignored, so the
+#             CSV written by export_owners reads back.
+#   JSONL     {"name" or "owner": ..., "pokedex": [ID or {"ID": ...}, ...]}
+#             per line, i.e. snapshot lines or export_owners output.
+# Export streams the tree in name order through ex7's listing formats.
+
+import csv
+import json
+from itertools import groupby
+
+import ex7
+
+IMPORT_FORMATS = ("csv", "jsonl")
+# Records whose Pokemon IDs are checked against the catalog together
+VALIDATE_BATCH = 10000
+
+
+def guess_format(filename):
+
+    return "csv" if filename.lower().endswith(".csv") else "jsonl"
+
+
+def read_csv_records(f):
+    """
+    Yields (owner name, [ID, ...]) per owner record: one per row with a
+    Pokedex column, one per run of consecutive rows of the same owner with
+    an ID column. Raises ValueError on a bad header.
+    """
+    reader = csv.DictReader(f)
+    fields = {name.strip().lower(): name for name in reader.fieldnames or []}
+    if "owner" not in fields or not ("id" in fields or "pokedex" in fields):
+        raise ValueError("CSV import needs an Owner column and an ID or Pokedex column.")
+    owner_field = fields["owner"]
+    if "pokedex" in fields:
+        for row in reader:
+            yield row[owner_field], (row[fields["pokedex"]] or "").replace(";", " ").split()
+        return
+    id_field = fields["id"]
+    for _, rows in groupby(reader, key=lambda row: (row[owner_field] or "").strip().lower()):
+        rows = list(rows)
+        yield rows[0][owner_field], [row[id_field] for row in rows if (row[id_field] or "").strip()]
+
+
+def read_jsonl_records(f):
+    """
+    Yields (owner name, [ID, ...]) per JSON line. A line that isn't a JSON
+    object with a list "pokedex" yields (None, []), which import_owners
+    counts as a bad record.
+    """
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield None, []
+            continue
+        if not isinstance(record, dict):
+            yield None, []
+            continue
+        if "format" in record and "pokedex" not in record:
+            continue  # Snapshot header
+        pokedex = record.get("pokedex", [])
+        if not isinstance(pokedex, list):
+            yield None, []
+            continue
+        name = record.get("name", record.get("owner"))
+        ids = [poke.get("ID") if isinstance(poke, dict) else poke for poke in pokedex]
+        yield name, ids
+
+
+def is_id_like(raw_id):
+
+    # Lists, objects, null, floats and booleans are never valid IDs
+    return isinstance(raw_id, (str, int)) and not isinstance(raw_id, bool)
+
+
+def validate_batch(batch, by_id, stats):
+    """
+    Turns a batch of raw (name, ids) records into (name, [species records]).
+    The distinct IDs of the whole batch are parsed and looked up once;
+    unknown or malformed IDs are dropped and counted.
+    """
+    parsed = {}
+    for _, ids in batch:
+        for raw_id in ids:
+            if is_id_like(raw_id) and raw_id not in parsed:
+                try:
+                    parsed[raw_id] = by_id.get(int(raw_id))
+                except ValueError:
+                    parsed[raw_id] = None
+    for name, ids in batch:
+        if not isinstance(name, str) or not name.strip():
+            stats["bad_records"] += 1
+            continue
+        pokes = []
+        for raw_id in ids:
+            poke = parsed[raw_id] if is_id_like(raw_id) else None
+            if poke is None:
+                stats["unknown_ids"] += 1
+            else:
+                pokes.append(poke)
+        yield name.strip(), pokes
+
+
+def import_owners(records, replace=False):
+    """
+    Bulk-loads (owner name, [ID, ...]) records into ex7.ownerRoot:
+    validates IDs in batches, sorts the new owners once by lower-cased
+    name, merges them with the current owners (unless 'replace') and links
+    the result bottom-up into a perfectly balanced tree in O(n).
+    Repeated owners (case-insensitive) are merged into one Pokedex.
+    Listeners get a single "reset". Returns counts:
+      {"records", "owners", "merged", "pokemon", "unknown_ids", "bad_records"}
+    """
+    by_id = ex7.get_catalog()["by_id"]
+    stats = {"records": 0, "owners": 0, "merged": 0, "pokemon": 0, "unknown_ids": 0, "bad_records": 0}
+    imported = {}
+    batch = []
+
+    def flush():
+        for name, pokes in validate_batch(batch, by_id, stats):
+            owner_node = imported.get(name.lower())
+            if owner_node is None:
+                imported[name.lower()] = ex7.make_owner_node(name, pokes)
+            else:
+                stats["merged"] += 1
+                for poke in pokes:
+                    owner_node["pokedex"].add(poke)
+        del batch[:]
+
+    for record in records:
+        stats["records"] += 1
+        batch.append(record)
+        if len(batch) >= VALIDATE_BATCH:
+            flush()
+    flush()
+
+    new_owners = [imported[key] for key in sorted(imported)]
+    existing = [] if replace else list(ex7.iter_inorder(ex7.ownerRoot))
+    owners = []
+    i = 0
+    # Merge the two sorted lists; an imported owner that already exists adds to its Pokedex
+    for owner_node in new_owners:
+        key = owner_node["name"].lower()
+        while i < len(existing) and existing[i]["name"].lower() < key:
+            owners.append(existing[i])
+            i += 1
+        if i < len(existing) and existing[i]["name"].lower() == key:
+            stats["merged"] += 1
+            for poke in owner_node["pokedex"]:
+                existing[i]["pokedex"].add(poke)
+            continue
+        owners.append(owner_node)
+    owners.extend(existing[i:])
+
+    stats["owners"] = len(new_owners)
+    stats["pokemon"] = sum(len(owner["pokedex"]) for owner in new_owners)
+    ex7.ownerRoot = ex7.build_balanced_owner_tree(owners)
+    ex7.notify_mutation("reset", None, {})
+    return stats
+
+
+def import_file(filename, fmt=None, replace=False):
+    """Streams 'filename' (CSV or JSON lines) into import_owners."""
+    fmt = fmt or guess_format(filename)
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unknown import format '{fmt}'.")
+    with open(filename, mode='r', encoding='utf-8', newline='') as f:
+        records = read_csv_records(f) if fmt == "csv" else read_jsonl_records(f)
+        return import_owners(records, replace=replace)
+
+
+def export_owners(root, file, fmt="jsonl"):
+    """
+    Streams every owner in name order to 'file' as CSV (Owner,ID,Name,...
+    one row per Pokemon) or JSON lines ({"owner": ..., "pokedex": [...]}),
+    both of which import_file reads back.
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'.")
+    ex7.in_order(root, file=file, fmt=fmt)
+
+
+def export_file(filename, root=None, fmt=None):
+
+    fmt = fmt or guess_format(filename)
+    with open(filename, mode='w', encoding='utf-8', newline='') as f:
+        export_owners(ex7.ownerRoot if root is None else root, f, fmt)
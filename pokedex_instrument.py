@@ -0,0 +1,278 @@
+# pokedex_instrument.py
+#
+# Opt-in instrumentation of the ex7 operations. enable() swaps timing
+# wrappers in for the functions in INSTRUMENTED (module globals, so calls
+# from inside ex7 are seen too) and disable() puts the originals back, so
+# when it is off the cost is exactly zero. Per operation it records call
+# count, total time and latency percentiles; for owner lookups, inserts
+# and deletes also the tree depth reached and the name comparisons made.
+#
+#   python ex7.py --batch script.txt --stats text
+#   python ex7.py --batch script.txt --profile cprofile
+
+import cProfile
+import io
+import json
+import math
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+import ex7
+
+# ex7 functions wrapped by enable(); the lookup ones also get depth/comparisons
+INSTRUMENTED = (
+    "read_hoenn_csv", "load_catalog",
+    "find_owner_bst", "insert_owner_bst", "delete_owner_bst",
+    "create_owner", "remove_owner",
+    "add_pokemon_id", "release_pokemon_name", "evolve_pokemon_name",
+    "filter_pokedex",
+    "bfs_traversal", "pre_order", "in_order", "post_order",
+    "sort_owners_by_num_pokemon",
+)
+TREE_WALKS = ("find_owner_bst", "insert_owner_bst", "delete_owner_bst")
+# Latencies kept per operation for the percentiles (the most recent ones)
+SAMPLE_LIMIT = 10000
+
+
+class OpStats:
+    """Counters for one operation name."""
+
+    __slots__ = ("name", "calls", "total_ns", "max_ns", "samples", "walks", "depth_total", "depth_max",
+                 "comparisons_total")
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.samples = deque(maxlen=SAMPLE_LIMIT)
+        self.walks = 0
+        self.depth_total = 0
+        self.depth_max = 0
+        self.comparisons_total = 0
+
+    def percentile(self, p):
+
+        if not self.samples:
+            return 0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1)]
+
+    def as_dict(self):
+
+        row = {
+            "calls": self.calls,
+            "total_ms": self.total_ns / 1e6,
+            "mean_us": self.total_ns / self.calls / 1e3 if self.calls else 0.0,
+            "p50_us": self.percentile(50) / 1e3,
+            "p99_us": self.percentile(99) / 1e3,
+            "max_us": self.max_ns / 1e3,
+        }
+        if self.walks:
+            row["mean_depth"] = self.depth_total / self.walks
+            row["max_depth"] = self.depth_max
+            row["mean_comparisons"] = self.comparisons_total / self.walks
+        return row
+
+
+STATS = {}
+_stats_lock = threading.Lock()
+_originals = {}
+_local = threading.local()
+
+
+def op_stats(name):
+
+    with _stats_lock:
+        stats = STATS.get(name)
+        if stats is None:
+            stats = STATS[name] = OpStats(name)
+        return stats
+
+
+def record(name, elapsed_ns, depth=None, comparisons=0):
+
+    stats = op_stats(name)
+    with _stats_lock:
+        stats.calls += 1
+        stats.total_ns += elapsed_ns
+        stats.max_ns = max(stats.max_ns, elapsed_ns)
+        stats.samples.append(elapsed_ns)
+        if depth is not None:
+            stats.walks += 1
+            stats.depth_total += depth
+            stats.depth_max = max(stats.depth_max, depth)
+            stats.comparisons_total += comparisons
+
+
+@contextmanager
+def timed(name):
+    """Records the enclosed block under 'name' (works whether or not enable() was called)."""
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter_ns() - start)
+
+
+def walk_owner_tree(root, owner_name):
+    """
+    The find_owner_bst search, counting as it goes.
+    Returns (node or None, depth reached, name comparisons).
+    """
+    key = owner_name.lower()
+    depth = 0
+    comparisons = 0
+    current = root
+    while current is not None:
+        depth += 1
+        current_name = current["name"].lower()
+        comparisons += 1
+        if key < current_name:
+            current = current["left"]
+            continue
+        comparisons += 1
+        if key > current_name:
+            current = current["right"]
+        else:
+            return current, depth, comparisons
+    return None, depth, comparisons
+
+
+def instrumented(name, func):
+    """
+    Wraps 'func' to record its calls under 'name'. Recursive calls (the
+    plain BST insert/delete recurse through the module global) are passed
+    straight through, so one outer call is one recorded call.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        active = getattr(_local, "active", None)
+        if active is None:
+            active = _local.active = set()
+        if name in active:
+            return func(*args, **kwargs)
+        active.add(name)
+        try:
+            depth = comparisons = None
+            if name == "find_owner_bst":
+                # The counting walk is the lookup itself
+                start = time.perf_counter_ns()
+                found, depth, comparisons = walk_owner_tree(args[0], args[1])
+                record(name, time.perf_counter_ns() - start, depth, comparisons)
+                return found
+            if name in TREE_WALKS:
+                owner_name = args[1]["name"] if name == "insert_owner_bst" else args[1]
+                _, depth, comparisons = walk_owner_tree(args[0], owner_name)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter_ns() - start, depth, comparisons or 0)
+        finally:
+            active.discard(name)
+
+    wrapper.__wrapped_original__ = func
+    return wrapper
+
+
+def enable(names=INSTRUMENTED):
+    """Swaps the wrappers in. Calling it again while enabled does nothing."""
+    for name in names:
+        if name in _originals:
+            continue
+        original = getattr(ex7, name)
+        _originals[name] = original
+        wrapper = instrumented(name, original)
+        setattr(ex7, name, wrapper)
+        # The batch "print" command looks traversals up in this table
+        for key, func in ex7.TRAVERSALS.items():
+            if func is original:
+                ex7.TRAVERSALS[key] = wrapper
+
+
+def disable():
+    """Puts the original functions back. The collected stats are kept."""
+    for name, original in _originals.items():
+        wrapper = getattr(ex7, name)
+        setattr(ex7, name, original)
+        for key, func in ex7.TRAVERSALS.items():
+            if func is wrapper:
+                ex7.TRAVERSALS[key] = original
+    _originals.clear()
+
+
+def is_enabled():
+
+    return bool(_originals)
+
+
+def reset():
+
+    with _stats_lock:
+        STATS.clear()
+
+
+def snapshot():
+    """{operation name: counters dict}, busiest first."""
+    with _stats_lock:
+        rows = sorted(STATS.values(), key=lambda stats: -stats.total_ns)
+        return {stats.name: stats.as_dict() for stats in rows}
+
+
+def dump_text(file=None):
+
+    rows = snapshot()
+    print(f"{'operation':<28}{'calls':>10}{'total ms':>12}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}"
+          f"{'max us':>11}{'depth':>8}{'cmp':>8}", file=file)
+    for name, row in rows.items():
+        depth = f"{row['mean_depth']:.1f}" if "mean_depth" in row else "-"
+        comparisons = f"{row['mean_comparisons']:.1f}" if "mean_comparisons" in row else "-"
+        print(f"{name:<28}{row['calls']:>10}{row['total_ms']:>12.2f}{row['mean_us']:>10.2f}"
+              f"{row['p50_us']:>10.2f}{row['p99_us']:>10.2f}{row['max_us']:>11.2f}{depth:>8}{comparisons:>8}",
+              file=file)
+
+
+def dump_json(file=None):
+
+    json.dump(snapshot(), file or sys.stdout, indent=2)
+    (file or sys.stdout).write("\n")
+
+
+@contextmanager
+def profile(mode, file=None, top=20):
+    """
+    Runs the enclosed block under cProfile ("cprofile", top functions by
+    cumulative time) or tracemalloc ("tracemalloc", top allocation sites)
+    and writes the report to 'file' (stderr by default) afterwards.
+    """
+    file = file or sys.stderr
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            report = io.StringIO()
+            pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(top)
+            file.write(report.getvalue())
+    elif mode == "tracemalloc":
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            top_stats = tracemalloc.take_snapshot().statistics("lineno")[:top]
+            tracemalloc.stop()
+            file.write(f"tracemalloc: current {current / 1e6:.1f}MB, peak {peak / 1e6:.1f}MB\n")
+            for stat in top_stats:
+                file.write(f"{stat}\n")
+    else:
+        raise ValueError(f"Unknown profile mode '{mode}'.")
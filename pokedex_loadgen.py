@@ -0,0 +1,148 @@
+# pokedex_loadgen.py
+#
+# Load generator for pokedex_server.py. Opens several connections, creates
+# a set of owners, then fires a read/write mix at random owners and reports
+# throughput and latency.
+#
+#   python pokedex_loadgen.py --port 7777 --connections 16 --requests 5000
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+
+class Connection:
+    """One client connection; requests are sent and answered in order."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.next_id = 0
+
+    @classmethod
+    async def open(cls, host, port, unix_path=None):
+
+        if unix_path:
+            reader, writer = await asyncio.open_unix_connection(unix_path, limit=1 << 24)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=1 << 24)
+        return cls(reader, writer)
+
+    async def request(self, **request):
+
+        self.next_id += 1
+        request["id"] = self.next_id
+        self.writer.write(json.dumps(request).encode("utf-8") + b"\n")
+        await self.writer.drain()
+        response = json.loads(await self.reader.readline())
+        if response.get("id") != request["id"]:
+            raise RuntimeError(f"Out-of-order response: {response}")
+        return response
+
+    async def close(self):
+
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+def make_request(rng, owners, write_ratio):
+    """Picks one random request from the read/write mix."""
+    owner = rng.choice(owners)
+    if rng.random() < write_ratio:
+        kind = rng.choice(("add", "release", "evolve"))
+        if kind == "add":
+            return {"op": "add", "owner": owner, "ID": rng.randint(1, 135)}
+        # Names of low-numbered species, so some of these hit and some miss
+        name = rng.choice(("Treecko", "Torchic", "Mudkip", "Grovyle", "Combusken", "Marshtomp"))
+        return {"op": kind, "owner": owner, "name": name}
+    kind = rng.random()
+    if kind < 0.6:
+        return {"op": "find", "owner": owner}
+    if kind < 0.8:
+        return {"op": "filter", "owner": owner, "kind": "type", "value": rng.choice(("Water", "Fire", "Grass"))}
+    if kind < 0.95:
+        return {"op": "query", "owner": owner, "conditions": ["attack>60"], "sort": "-attack", "limit": 5}
+    return {"op": "ranking", "top": True, "limit": 10}
+
+
+async def create_owners(connection, owners, seed):
+
+    rng = random.Random(seed)
+    for owner in owners:
+        await connection.request(op="create", owner=owner, starter=rng.randint(1, 3))
+
+
+async def worker(connection, rng, owners, requests, write_ratio, latencies, counts):
+
+    for _ in range(requests):
+        request = make_request(rng, owners, write_ratio)
+        start = time.perf_counter()
+        response = await connection.request(**request)
+        latencies.append(time.perf_counter() - start)
+        counts[request["op"]] = counts.get(request["op"], 0) + 1
+        if "error" in response:
+            counts["errors"] = counts.get("errors", 0) + 1
+
+
+def percentile(ordered, fraction):
+
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run(args):
+
+    rng = random.Random(args.seed)
+    connections = [await Connection.open(args.host, args.port, args.unix) for _ in range(args.connections)]
+    owners = [f"{args.prefix}{i:06d}" for i in range(args.owners)]
+
+    # Setup: create the owners, spread over the connections
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        create_owners(connection, owners[i::len(connections)], rng.random())
+        for i, connection in enumerate(connections)
+    ))
+    setup = time.perf_counter() - start
+
+    latencies = []
+    counts = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        worker(connection, random.Random(rng.random()), owners, args.requests, args.write_ratio, latencies, counts)
+        for connection in connections
+    ))
+    elapsed = time.perf_counter() - start
+    for connection in connections:
+        await connection.close()
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"setup: {args.owners} owners created in {setup:.2f}s")
+    print(f"{total} requests over {args.connections} connections in {elapsed:.2f}s "
+          f"=> {total / elapsed:.0f} req/s")
+    print(f"latency p50 {percentile(latencies, 0.50) * 1e3:.2f}ms  "
+          f"p99 {percentile(latencies, 0.99) * 1e3:.2f}ms  max {latencies[-1] * 1e3:.2f}ms")
+    print("mix: " + ", ".join(f"{op}={count}" for op, count in sorted(counts.items())))
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Generate load against pokedex_server.py.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--unix", metavar="PATH", help="connect to a Unix socket instead of TCP")
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per connection")
+    parser.add_argument("--owners", type=int, default=1000)
+    parser.add_argument("--prefix", default="load", help="owner name prefix")
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
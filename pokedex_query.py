@@ -0,0 +1,248 @@
+# pokedex_query.py
+
+import heapq
+import re
+from bisect import bisect_left, bisect_right
+from itertools import islice
+
+import ex7
+
+# A condition is a tuple (field, op, value):
+#   ("type", "=", "water")     ("evolvable", "=", True)
+#   ("attack", ">", 60)        ("hp", "<=", 80)       (ops: > >= < <= =)
+#   ("prefix", "^=", "mu")
+CONDITION_RE = re.compile(r"^\s*([A-Za-z]+)\s*(>=|<=|\^=|>|<|=)?\s*(.*?)\s*$")
+STAT_FIELDS = {"attack": "Attack", "hp": "HP"}
+SORT_FIELDS = {"id": "ID", "name": "Name", "type": "Type", "hp": "HP", "attack": "Attack"}
+
+# Indexes over the species catalog, built on first use (see catalog_indexes)
+_INDEXES = {"catalog": None}
+# Memoized conditions / condition lists kept per catalog before starting over
+MATCH_CACHE_SIZE = 4096
+
+
+def parse_condition(text):
+    """
+    Parses one condition such as 'type=water', 'attack>60', 'hp<=80',
+    'prefix=mu' (or 'name^=mu') or 'evolvable' into a (field, op, value) tuple.
+    Raises ValueError for anything else.
+    """
+    match = CONDITION_RE.match(text)
+    if not match:
+        raise ValueError(f"Bad condition '{text}'.")
+    field, op, value = match.group(1).lower(), match.group(2), match.group(3)
+    if field == "evolvable" and op is None:
+        return ("evolvable", "=", True)
+    if field == "evolvable" and op == "=" and value.upper() in ("TRUE", "FALSE"):
+        return ("evolvable", "=", value.upper() == "TRUE")
+    if field == "type" and op == "=" and value:
+        return ("type", "=", value.lower())
+    if field in ("prefix", "name") and op in ("=", "^=") and value:
+        return ("prefix", "^=", value.lower())
+    if field in STAT_FIELDS and op in (">", ">=", "<", "<=", "=") and value.lstrip("-").isdigit():
+        return (field, op, int(value))
+    raise ValueError(f"Bad condition '{text}'.")
+
+
+def parse_query(tokens):
+    """
+    Splits query tokens into (conditions, sort, limit). Besides conditions,
+    'sort=<field>' (prefix the field with '-' for descending) and 'limit=<n>'
+    are understood, e.g. ["type=water", "attack>60", "sort=-attack", "limit=10"].
+    """
+    conditions = []
+    sort = None
+    limit = None
+    for token in tokens:
+        lowered = token.strip().lower()
+        if lowered.startswith("sort="):
+            sort = lowered[len("sort="):]
+            if sort.lstrip("-") not in SORT_FIELDS:
+                raise ValueError(f"Can't sort by '{sort}'.")
+        elif lowered.startswith("limit="):
+            if not lowered[len("limit="):].isdigit():
+                raise ValueError(f"Bad limit '{token}'.")
+            limit = int(lowered[len("limit="):])
+        else:
+            conditions.append(parse_condition(token))
+    return conditions, sort, limit
+
+
+########################
+# Catalog indexes
+########################
+
+def build_prefix_trie(pokes):
+    """
+    Builds a trie over lower-cased species names. Each node is
+    {"ids": set of IDs whose name starts with this prefix, "next": {char: node}}.
+    """
+    trie = {"ids": set(), "next": {}}
+    for poke in pokes:
+        node = trie
+        node["ids"].add(poke["ID"])
+        for char in poke["Name"].strip().lower():
+            node = node["next"].setdefault(char, {"ids": set(), "next": {}})
+            node["ids"].add(poke["ID"])
+    return trie
+
+
+def catalog_indexes():
+    """
+    Returns the query indexes for the current ex7 catalog, building them the
+    first time (and again if the catalog object was replaced):
+      "stats":  {"attack"/"hp": (sorted values, IDs in the same order)}
+      "prefix": name trie from build_prefix_trie
+      "matches": {condition: frozenset of IDs}, filled in by matching_ids
+      "plans":   {tuple of conditions: frozenset of IDs}, filled in by plan_query
+    Type and Can Evolve come straight from the catalog's own indexes.
+    """
+    catalog = ex7.get_catalog()
+    if _INDEXES["catalog"] is not catalog:
+        pokes = list(catalog["by_id"].values())
+        stats = {}
+        for field, key in STAT_FIELDS.items():
+            ordered = sorted(pokes, key=lambda poke: poke[key])
+            stats[field] = ([poke[key] for poke in ordered], [poke["ID"] for poke in ordered])
+        _INDEXES.update(catalog=catalog, stats=stats, prefix=build_prefix_trie(pokes), matches={},
+                        plans={})
+    return _INDEXES
+
+
+def _resolve_condition(indexes, condition):
+
+    field, op, value = condition
+    if field == "type":
+        return frozenset(poke["ID"] for poke in ex7.get_pokes_by_type(value))
+    if field == "evolvable":
+        return frozenset(poke["ID"] for poke in ex7.get_pokes_by_evolve(value))
+    if field == "prefix":
+        node = indexes["prefix"]
+        for char in value:
+            node = node["next"].get(char)
+            if node is None:
+                return frozenset()
+        return frozenset(node["ids"])
+    # Range predicate on a sorted stat column
+    values, ids = indexes["stats"][field]
+    if op == ">":
+        return frozenset(ids[bisect_right(values, value):])
+    if op == ">=":
+        return frozenset(ids[bisect_left(values, value):])
+    if op == "<":
+        return frozenset(ids[:bisect_left(values, value)])
+    if op == "<=":
+        return frozenset(ids[:bisect_right(values, value)])
+    return frozenset(ids[bisect_left(values, value):bisect_right(values, value)])
+
+
+def _memoized(cache, key, compute):
+
+    value = cache.get(key)
+    if value is None:
+        if len(cache) >= MATCH_CACHE_SIZE:
+            cache.clear()
+        value = cache[key] = compute()
+    return value
+
+
+def matching_ids(condition):
+    """
+    Returns the frozenset of species IDs that satisfy one condition. Each
+    distinct condition is resolved against the indexes once per catalog.
+    """
+    indexes = catalog_indexes()
+    return _memoized(indexes["matches"], condition, lambda: _resolve_condition(indexes, condition))
+
+
+def candidate_sets(conditions):
+    """The matching_ids sets of all conditions, smallest first."""
+    return sorted((matching_ids(condition) for condition in conditions), key=len)
+
+
+def _intersect(sets):
+
+    result = sets[0]
+    for candidates in sets[1:]:
+        if not result:
+            break
+        result = result & candidates
+    return result
+
+
+def plan_query(conditions):
+    """
+    Resolves all conditions against the catalog indexes and intersects the
+    results, smallest first. Returns the frozenset of matching species IDs,
+    or None when there are no conditions (everything matches). Results are
+    memoized per condition list, so a repeated query builds no sets at all.
+    """
+    if not conditions:
+        return None
+    return _memoized(catalog_indexes()["plans"], tuple(conditions),
+                     lambda: _intersect(candidate_sets(conditions)))
+
+
+########################
+# Execution
+########################
+
+def _scan_owner(owner_node, ids):
+
+    pokedex = owner_node["pokedex"]
+    if ids is None:
+        return iter(pokedex)
+    # Walk the pokedex in display order, checking each entry against the plan
+    return (poke for poke in pokedex if poke["ID"] in ids)
+
+
+def _probe_owner(owner_node, ids):
+
+    # Order doesn't matter (the caller sorts), so look each ID up directly
+    pokedex = owner_node["pokedex"]
+    if ids is None or len(ids) >= len(pokedex):
+        return _scan_owner(owner_node, ids)
+    return (pokedex.get_by_id(poke_id) for poke_id in ids if poke_id in pokedex)
+
+
+def sort_results(pairs, sort, limit=None):
+    """
+    Sorts (owner_node, poke) pairs by a sort spec such as "attack" or
+    "-hp" and keeps the first 'limit' (using a heap when limit is set).
+    """
+    descending = sort.startswith("-")
+    key_name = SORT_FIELDS[sort.lstrip("-")]
+    # Owner name breaks ties, so results are stable across runs
+    key = lambda pair: (pair[1][key_name], pair[0]["name"].lower(), pair[1]["ID"])
+    if limit is not None:
+        pick = heapq.nlargest if descending else heapq.nsmallest
+        return iter(pick(limit, pairs, key=key))
+    return iter(sorted(pairs, key=key, reverse=descending))
+
+
+def query_owner(owner_node, conditions, sort=None, limit=None):
+    """
+    Lazily yields the pokes in one owner's pokedex that match every condition.
+    Without 'sort' the results are in display order and evaluation stops as
+    soon as 'limit' results are found.
+    """
+    ids = plan_query(conditions)
+    if sort is None:
+        return islice(_scan_owner(owner_node, ids), limit)
+    pairs = ((owner_node, poke) for poke in _probe_owner(owner_node, ids))
+    return (poke for _, poke in sort_results(pairs, sort, limit))
+
+
+def query_all_owners(root, conditions, sort=None, limit=None):
+    """
+    Like query_owner, across every owner in the tree (in name order).
+    Yields (owner_node, poke) pairs.
+    """
+    ids = plan_query(conditions)
+    if ids is not None and not ids:
+        return iter(())
+    if sort is None:
+        pairs = ((owner, poke) for owner in ex7.iter_inorder(root) for poke in _scan_owner(owner, ids))
+        return islice(pairs, limit)
+    pairs = ((owner, poke) for owner in ex7.iter_inorder(root) for poke in _probe_owner(owner, ids))
+    return sort_results(pairs, sort, limit)
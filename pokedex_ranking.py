@@ -0,0 +1,246 @@
+# pokedex_ranking.py
+
+import ex7
+
+
+########################
+# Order-statistic AVL tree
+########################
+
+# Nodes are dicts like the owner tree's, plus a subtree "size" so ranks can
+# be counted in O(log n):
+#   { "key": (pokedex size, lower-cased name), "owner": owner_node,
+#     "left": node, "right": node, "height": int, "size": int }
+
+def _height(node):
+
+    return node["height"] if node else 0
+
+
+def _size(node):
+
+    return node["size"] if node else 0
+
+
+def _update(node):
+
+    node["height"] = 1 + max(_height(node["left"]), _height(node["right"]))
+    node["size"] = 1 + _size(node["left"]) + _size(node["right"])
+
+
+def _rotate_right(node):
+
+    pivot = node["left"]
+    node["left"] = pivot["right"]
+    pivot["right"] = node
+    _update(node)
+    _update(pivot)
+    return pivot
+
+
+def _rotate_left(node):
+
+    pivot = node["right"]
+    node["right"] = pivot["left"]
+    pivot["left"] = node
+    _update(node)
+    _update(pivot)
+    return pivot
+
+
+def _rebalance(node):
+
+    _update(node)
+    balance = _height(node["left"]) - _height(node["right"])
+    if balance > 1:
+        if _height(node["left"]["left"]) < _height(node["left"]["right"]):
+            node["left"] = _rotate_left(node["left"])
+        return _rotate_right(node)
+    if balance < -1:
+        if _height(node["right"]["right"]) < _height(node["right"]["left"]):
+            node["right"] = _rotate_right(node["right"])
+        return _rotate_left(node)
+    return node
+
+
+def _insert(node, key, owner):
+
+    if node is None:
+        return {"key": key, "owner": owner, "left": None, "right": None, "height": 1, "size": 1}
+    if key < node["key"]:
+        node["left"] = _insert(node["left"], key, owner)
+    elif key > node["key"]:
+        node["right"] = _insert(node["right"], key, owner)
+    else:
+        node["owner"] = owner
+        return node
+    return _rebalance(node)
+
+
+def _detach_min(node):
+
+    if node["left"] is None:
+        return node["right"], node
+    node["left"], smallest = _detach_min(node["left"])
+    return _rebalance(node), smallest
+
+
+def _delete(node, key):
+
+    if node is None:
+        return None
+    if key < node["key"]:
+        node["left"] = _delete(node["left"], key)
+    elif key > node["key"]:
+        node["right"] = _delete(node["right"], key)
+    else:
+        if node["left"] is None:
+            return node["right"]
+        if node["right"] is None:
+            return node["left"]
+        right, successor = _detach_min(node["right"])
+        successor["left"] = node["left"]
+        successor["right"] = right
+        node = successor
+    return _rebalance(node)
+
+
+def _build(entries, lo, hi):
+
+    # entries: sorted list of (key, owner) pairs
+    if lo > hi:
+        return None
+    mid = (lo + hi) // 2
+    node = {"key": entries[mid][0], "owner": entries[mid][1], "height": 1, "size": 1,
+            "left": _build(entries, lo, mid - 1), "right": _build(entries, mid + 1, hi)}
+    _update(node)
+    return node
+
+
+def ranking_key(owner_node, pokedex_size=None):
+    """The sort key used by sort_owners_by_num_pokemon: (pokedex size, lower-cased name)."""
+    if pokedex_size is None:
+        pokedex_size = len(owner_node["pokedex"])
+    return (pokedex_size, owner_node["name"].lower())
+
+
+########################
+# Owner ranking
+########################
+
+class OwnerRanking:
+    """
+    The owners ordered by ranking_key, kept up to date from ex7's mutation
+    events instead of being re-sorted on every listing. Walking it in order
+    is O(n); top(k) and rank() are O(log n + k) and O(log n).
+    """
+
+    def __init__(self, root=None):
+        self._root = None
+        self.rebuild(root)
+
+    def __len__(self):
+        return _size(self._root)
+
+    def rebuild(self, root):
+        """Re-indexes every owner in the tree rooted at 'root' from scratch."""
+        entries = sorted((ranking_key(owner), owner) for owner in ex7.iter_inorder(root))
+        self._root = _build(entries, 0, len(entries) - 1)
+
+    def on_mutation(self, event, owner_node, detail):
+
+        if event == "reset":
+            self.rebuild(ex7.ownerRoot)
+            return
+        size = len(owner_node["pokedex"])
+        if event == "create":
+            self._root = _insert(self._root, ranking_key(owner_node), owner_node)
+        elif event == "delete":
+            self._root = _delete(self._root, ranking_key(owner_node))
+        else:
+            # Work out the size the pokedex had before this change
+            if event == "add":
+                old_size = size - 1
+            elif event == "release" or (event == "evolve" and detail["merged"]):
+                old_size = size + 1
+            else:
+                return
+            self._root = _delete(self._root, ranking_key(owner_node, old_size))
+            self._root = _insert(self._root, ranking_key(owner_node), owner_node)
+
+    def iter_sorted(self, reverse=False):
+        """Yields owner nodes by (pokedex size, name), or the reverse."""
+        near, far = ("right", "left") if reverse else ("left", "right")
+        stack = []
+        node = self._root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node[near]
+            node = stack.pop()
+            yield node["owner"]
+            node = node[far]
+
+    def top(self, k):
+        """The k owners with the most Pokemon, most first."""
+        result = []
+        for owner in self.iter_sorted(reverse=True):
+            if len(result) >= k:
+                break
+            result.append(owner)
+        return result
+
+    def rank(self, owner_name):
+        """
+        0-based position of an owner in the sort_owners_by_num_pokemon
+        listing (fewest Pokemon first), or None if there is no such owner.
+        """
+        owner_node = ex7.find_owner_bst(ex7.ownerRoot, owner_name)
+        if owner_node is None:
+            return None
+        key = ranking_key(owner_node)
+        position = 0
+        node = self._root
+        while node:
+            if key < node["key"]:
+                node = node["left"]
+            elif key > node["key"]:
+                position += _size(node["left"]) + 1
+                node = node["right"]
+            else:
+                return position + _size(node["left"])
+        return None
+
+    def select(self, position):
+        """The owner at a 0-based position of the listing, or None."""
+        node = self._root
+        while node:
+            left_size = _size(node["left"])
+            if position < left_size:
+                node = node["left"]
+            elif position > left_size:
+                position -= left_size + 1
+                node = node["right"]
+            else:
+                return node["owner"]
+        return None
+
+
+def enable_owner_ranking():
+    """
+    Builds an OwnerRanking over ex7.ownerRoot, subscribes it to mutation
+    events and makes sort_owners_by_num_pokemon stream from it.
+    Returns the ranking (the existing one if already enabled).
+    """
+    if ex7.OWNER_RANKING is None:
+        ranking = OwnerRanking(ex7.ownerRoot)
+        ex7.add_mutation_listener(ranking.on_mutation)
+        ex7.OWNER_RANKING = ranking
+    return ex7.OWNER_RANKING
+
+
+def disable_owner_ranking():
+
+    if ex7.OWNER_RANKING is not None:
+        ex7.remove_mutation_listener(ex7.OWNER_RANKING.on_mutation)
+        ex7.OWNER_RANKING = None
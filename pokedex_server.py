@@ -0,0 +1,387 @@
+# pokedex_server.py
+#
+# A multi-client Pokedex server. Clients send one JSON request per line and
+# get one JSON response per line, e.g.
+#   -> {"id": 1, "op": "add", "owner": "Ash", "ID": 25}
+#   <- {"id": 1, "ok": true, "message": "Pokemon ... added to Ash's Pokedex."}
+#
+#   python pokedex_server.py --port 7777
+#   python pokedex_server.py --unix /tmp/pokedex.sock --data-dir data
+
+import argparse
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import ex7
+import pokedex_query
+import pokedex_ranking
+
+PRINT_ORDERS = {
+    "bfs": ex7.iter_bfs,
+    "pre": ex7.iter_preorder,
+    "in": ex7.iter_inorder,
+    "post": ex7.iter_postorder,
+}
+# Request fields shared by several ops and the type each must have when given
+# (null counts as not given)
+FIELD_TYPES = {
+    "owner": str, "name": str, "kind": str, "sort": str, "order": str,
+    "prefix": str, "low": str, "high": str, "after": str,
+    "limit": int,
+}
+
+
+def check_fields(request):
+    """Raises TypeError/ValueError if a shared field has the wrong type or a negative limit."""
+    for key, field_type in FIELD_TYPES.items():
+        value = request.get(key)
+        if value is None:
+            continue
+        # bool is an int subclass, but never a sensible limit
+        if not isinstance(value, field_type) or isinstance(value, bool):
+            raise TypeError(f"'{key}' must be {'a string' if field_type is str else 'an integer'}")
+    if request.get("limit") is not None and request["limit"] < 0:
+        raise ValueError("'limit' can't be negative")
+
+
+class ReadWriteLock:
+    """
+    Many readers or one writer. A waiting writer stops new readers from
+    getting in, so a stream of reads can't starve it.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class PokedexServer:
+    """
+    Serves ex7.ownerRoot to many clients. Requests run on a thread pool, so
+    a long read (print, query across all owners) never stalls the event loop.
+    Locking is layered, always taken in this order:
+      tree lock (read/write)  create/delete take it for writing, since they
+                              reshape the tree; everything else reads
+      owner lock              one per owner, held while its pokedex is read
+                              or changed, so writes to different owners
+                              (and reads of other owners) run side by side
+      ex7.MUTATION_LOCK       around the shared ranking index/journal
+    """
+
+    def __init__(self, workers=8):
+        self.tree_lock = ReadWriteLock()
+        self._owner_locks = {}
+        self._owner_locks_guard = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.ranking = pokedex_ranking.enable_owner_ranking()
+
+    def owner_lock(self, owner_name):
+
+        with self._owner_locks_guard:
+            return self._owner_locks.setdefault(owner_name.strip().lower(), threading.Lock())
+
+    ########################
+    # Request handling (runs on the thread pool)
+    ########################
+
+    def handle_request(self, request):
+        """Runs one decoded request and returns the response dict."""
+        op = request.get("op")
+        handler = getattr(self, f"op_{op}", None) if isinstance(op, str) else None
+        if handler is None:
+            return {"ok": False, "error": f"Unknown op '{op}'."}
+        try:
+            check_fields(request)
+            return handler(request)
+        except (KeyError, TypeError, ValueError) as e:
+            return {"ok": False, "error": f"Bad request: {e}"}
+        except Exception as e:
+            # Anything else is still this request's failure, not the connection's
+            return {"ok": False, "error": f"Request failed: {e!r}"}
+
+    def _result(self, ok_message):
+
+        ok, message = ok_message
+        return {"ok": ok, "message": message}
+
+    def op_ping(self, request):
+
+        return {"ok": True, "message": "pong"}
+
+    def op_create(self, request):
+
+        with self.tree_lock.write():
+            return self._result(ex7.create_owner(request["owner"], request.get("starter", 1)))
+
+    def op_delete(self, request):
+
+        with self.tree_lock.write():
+            result = ex7.remove_owner(request["owner"])
+            if result[0]:
+                with self._owner_locks_guard:
+                    self._owner_locks.pop(request["owner"].strip().lower(), None)
+        return self._result(result)
+
+    @contextmanager
+    def _owner(self, owner_name):
+        # Tree read lock + that owner's lock; yields the node, or None
+        with self.tree_lock.read():
+            owner_node = ex7.find_owner_bst(ex7.ownerRoot, owner_name.strip())
+            if owner_node is None:
+                yield None
+                return
+            with self.owner_lock(owner_node["name"]):
+                yield owner_node
+
+    def _missing(self, owner_name):
+
+        return {"ok": False, "message": f"Owner'{owner_name.strip()}' not found."}
+
+    def op_find(self, request):
+
+        with self._owner(request["owner"]) as owner_node:
+            if owner_node is None:
+                return self._missing(request["owner"])
+            return {"ok": True, "owner": owner_node["name"], "pokedex": list(owner_node["pokedex"])}
+
+    def op_add(self, request):
+
+        with self._owner(request["owner"]) as owner_node:
+            if owner_node is None:
+                return self._missing(request["owner"])
+            return self._result(ex7.add_pokemon_id(owner_node, int(request["ID"])))
+
+    def op_release(self, request):
+
+        with self._owner(request["owner"]) as owner_node:
+            if owner_node is None:
+                return self._missing(request["owner"])
+            return self._result(ex7.release_pokemon_name(owner_node, request["name"]))
+
+    def op_evolve(self, request):
+
+        with self._owner(request["owner"]) as owner_node:
+            if owner_node is None:
+                return self._missing(request["owner"])
+            return self._result(ex7.evolve_pokemon_name(owner_node, request["name"]))
+
+    def op_filter(self, request):
+        # One display-menu filter: {"kind": "type"|"evolvable"|"attack"|"hp"|"prefix"|"all", "value": ...}
+        with self._owner(request["owner"]) as owner_node:
+            if owner_node is None:
+                return self._missing(request["owner"])
+            return {"ok": True, "pokedex": ex7.filter_owner(owner_node, request["kind"], request.get("value"))}
+
+    def op_query(self, request):
+        # {"owner": name or "*", "conditions": ["type=water", ...], "sort": "-attack", "limit": 10}
+        conditions = [pokedex_query.parse_condition(text) for text in request.get("conditions", [])]
+        sort = request.get("sort")
+        limit = request.get("limit")
+        if sort is not None and sort.lstrip("-") not in pokedex_query.SORT_FIELDS:
+            raise ValueError(f"can't sort by '{sort}'")
+        if request["owner"] != "*":
+            with self._owner(request["owner"]) as owner_node:
+                if owner_node is None:
+                    return self._missing(request["owner"])
+                def compute():
+                    return list(pokedex_query.query_owner(owner_node, conditions, sort, limit))
+                if ex7.RESULT_CACHE is None:
+                    return {"ok": True, "pokedex": compute()}
+                key = ("query", tuple(request.get("conditions", [])), sort, limit)
+                return {"ok": True, "pokedex": ex7.RESULT_CACHE.get_or_compute(owner_node["name"], key, compute)}
+
+        # All owners: lock each owner only while its own pokedex is scanned
+        pairs = []
+        with self.tree_lock.read():
+            for owner_node in ex7.iter_inorder(ex7.ownerRoot):
+                with self.owner_lock(owner_node["name"]):
+                    matches = list(pokedex_query.query_owner(owner_node, conditions, sort, limit))
+                pairs.extend((owner_node, poke) for poke in matches)
+                if sort is None and limit is not None and len(pairs) >= limit:
+                    break
+        if sort is not None:
+            pairs = list(pokedex_query.sort_results(pairs, sort, limit))
+        results = [{"owner": owner_node["name"], "pokemon": poke} for owner_node, poke in pairs[:limit]]
+        return {"ok": True, "results": results}
+
+    def op_ranking(self, request):
+        # Owners by number of Pokemon, fewest first (like the menu), or the
+        # top 'limit' owners with the most when "top" is true
+        limit = request.get("limit")
+        with self.tree_lock.read(), ex7.MUTATION_LOCK:
+            owners = self.ranking.iter_sorted(reverse=bool(request.get("top")))
+            rows = []
+            for owner_node in owners:
+                if limit is not None and len(rows) >= limit:
+                    break
+                rows.append({"owner": owner_node["name"], "count": len(owner_node["pokedex"])})
+        return {"ok": True, "owners": rows}
+
+    def op_cache(self, request):
+
+        if ex7.RESULT_CACHE is None:
+            return {"ok": False, "message": "Result cache is off."}
+        return {"ok": True, "cache": ex7.RESULT_CACHE.stats()}
+
+    def op_owners_of(self, request):
+        # {"pokemon": name or ID}: the owners holding that species
+        poke_ref = request["pokemon"]
+        if not isinstance(poke_ref, (str, int)) or isinstance(poke_ref, bool):
+            raise TypeError("'pokemon' must be a name or an ID")
+        if isinstance(poke_ref, int):
+            poke = ex7.get_poke_dict_by_id(poke_ref)
+        else:
+            poke = ex7.get_poke_dict_by_name(poke_ref)
+        if poke is None:
+            return {"ok": False, "message": f"No Pokemon '{poke_ref}' in Hoenn data."}
+        with self.tree_lock.read(), ex7.MUTATION_LOCK:
+            names = [owner_node["name"] for owner_node in ex7.species_index().owners_of(poke["ID"])]
+        return {"ok": True, "pokemon": poke, "count": len(names), "owners": names}
+
+    def op_rank(self, request):
+
+        with self.tree_lock.read(), ex7.MUTATION_LOCK:
+            position = self.ranking.rank(request["owner"])
+        if position is None:
+            return self._missing(request["owner"])
+        return {"ok": True, "rank": position}
+
+    def op_owners(self, request):
+        # {"prefix": str} or {"low": str, "high": str}, plus "after" and "limit";
+        # answers one page of owner names and the cursor for the next one
+        after = request.get("after")
+        limit = 100 if request.get("limit") is None else request["limit"]
+        if limit < 1:
+            raise ValueError("'limit' must be at least 1")
+        with self.tree_lock.read():
+            if "prefix" in request:
+                owners = ex7.iter_prefix(ex7.ownerRoot, request["prefix"], after=after)
+            else:
+                owners = ex7.iter_range(ex7.ownerRoot, request.get("low"), request.get("high"), after=after)
+            page, cursor = ex7.owner_page(owners, limit)
+            names = [owner_node["name"] for owner_node in page]
+        return {"ok": True, "owners": names, "next": cursor}
+
+    def op_print(self, request):
+        # {"order": "bfs"|"pre"|"in"|"post", "limit": n}
+        walk = PRINT_ORDERS[request.get("order", "bfs")]
+        limit = request.get("limit")
+        owners = []
+        with self.tree_lock.read():
+            for owner_node in walk(ex7.ownerRoot):
+                if limit is not None and len(owners) >= limit:
+                    break
+                with self.owner_lock(owner_node["name"]):
+                    owners.append({"owner": owner_node["name"], "pokedex": list(owner_node["pokedex"])})
+        return {"ok": True, "owners": owners}
+
+    ########################
+    # Networking
+    ########################
+
+    async def handle_client(self, reader, writer):
+
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("expected a JSON object")
+                except ValueError as e:
+                    response = {"ok": False, "error": f"Bad JSON: {e}"}
+                else:
+                    response = await loop.run_in_executor(self.executor, self.handle_request, request)
+                    if "id" in request:
+                        response["id"] = request["id"]
+                writer.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=7777, unix_path=None):
+
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_client, path=unix_path, limit=1 << 20)
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port, limit=1 << 20)
+        where = unix_path or f"{host}:{port}"
+        print(f"Pokedex server listening on {where}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Serve the Pokedex to many clients over TCP or a Unix socket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=8, help="request worker threads")
+    parser.add_argument("--data-dir", metavar="DIR", help="persist owners in DIR (see pokedex_store)")
+    parser.add_argument("--result-cache", type=int, default=4096, metavar="SIZE",
+                        help="cache up to SIZE filter/query results (0: off)")
+    args = parser.parse_args(argv)
+
+    # Many trainers at once: keep the tree balanced whatever the insert order
+    ex7.set_owner_tree_balanced(True)
+    store = None
+    if args.data_dir:
+        import pokedex_store
+        store = pokedex_store.PokedexStore(args.data_dir)
+        store.open()
+    if args.result_cache > 0:
+        import pokedex_cache
+        pokedex_cache.enable_result_cache(args.result_cache)
+    server = PokedexServer(workers=args.workers)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.executor.shutdown(wait=True)
+        if store is not None:
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+# pokedex_shard.py
+#
+# Sharded owner store: owners are partitioned (by name hash or by name
+# range) across worker processes, each holding its own ex7 owner tree.
+# The coordinator routes per-owner operations to the owning shard and
+# answers whole-store listings by scatter-gather.
+#
+#   python pokedex_shard.py --shards 1 2 4 --owners 100000 --ops 400000
+
+import argparse
+import heapq
+import json
+import multiprocessing
+import random
+import string
+import time
+import zlib
+from bisect import bisect_right
+
+import ex7
+import pokedex_ranking
+
+
+########################
+# Worker side
+########################
+
+def _owner_ids(owner_node):
+
+    return [poke["ID"] for poke in owner_node["pokedex"]]
+
+
+def run_shard_op(op, args):
+    """
+    Runs one operation against this process's ex7.ownerRoot. Results are
+    kept small and picklable: pokedexes travel as lists of species IDs.
+    """
+    if op == "create":
+        return ex7.create_owner(args[0], args[1])
+    if op == "delete":
+        return ex7.remove_owner(args[0])
+    if op == "owners":
+        # Every owner in name order, for print_all_owners
+        return [(owner_node["name"], _owner_ids(owner_node)) for owner_node in ex7.iter_inorder(ex7.ownerRoot)]
+    if op == "ranking":
+        # Already in (size, folded name) order thanks to the ranking index
+        return [(len(owner_node["pokedex"]), owner_node["name"].lower(), owner_node["name"])
+                for owner_node in ex7.OWNER_RANKING.iter_sorted()]
+    if op == "count":
+        return sum(1 for _ in ex7.iter_inorder(ex7.ownerRoot))
+
+    owner_node = ex7.find_owner_bst(ex7.ownerRoot, args[0].strip())
+    if op == "find":
+        return None if owner_node is None else (owner_node["name"], _owner_ids(owner_node))
+    if owner_node is None:
+        return False, f"Owner'{args[0].strip()}' not found."
+    if op == "add":
+        return ex7.add_pokemon_id(owner_node, args[1])
+    if op == "release":
+        return ex7.release_pokemon_name(owner_node, args[1])
+    if op == "evolve":
+        return ex7.evolve_pokemon_name(owner_node, args[1])
+    if op == "filter":
+        # evolvable and all take no value
+        kind, value = args[1], args[2] if len(args) > 2 else None
+        problem = ex7.check_filter(kind, value)
+        if problem:
+            return False, problem
+        return True, [poke["ID"] for poke in ex7.filter_pokedex(owner_node["pokedex"], kind, value)]
+    raise ValueError(f"Unknown shard op '{op}'.")
+
+
+def shard_worker(conn):
+    """
+    Worker process loop. Receives lists of (op, args) and answers each list
+    with the list of results, in order; None shuts the worker down.
+    """
+    # A forked worker inherits the parent's tree and listeners; start clean
+    ex7.ownerRoot = None
+    del ex7.MUTATION_LISTENERS[:]
+    ex7.OWNER_RANKING = None
+    ex7.set_owner_tree_balanced(True)
+    pokedex_ranking.enable_owner_ranking()
+    while True:
+        batch = conn.recv()
+        if batch is None:
+            break
+        results = []
+        for op, args in batch:
+            # Any failure is that op's result; a dead worker would lose the whole shard
+            try:
+                results.append(run_shard_op(op, args))
+            except Exception as e:
+                results.append((False, f"Error: {e}"))
+        conn.send(results)
+    conn.close()
+
+
+########################
+# Coordinator side
+########################
+
+class ShardedOwnerStore:
+    """
+    Owners spread over 'num_shards' worker processes.
+    partition="hash" spreads them by a CRC32 of the lower-cased name;
+    partition="range" gives each shard a contiguous slice of the alphabet
+    (split points in 'boundaries', lower-case, one fewer than the shards),
+    so in-order listings need no merge.
+    Per-owner calls go to one shard; execute_many() batches a whole command
+    list into one round trip per shard, which is what makes the shards
+    run in parallel.
+    """
+
+    def __init__(self, num_shards=None, partition="hash", boundaries=None, start_method="spawn"):
+        self.num_shards = num_shards or multiprocessing.cpu_count()
+        if partition not in ("hash", "range"):
+            raise ValueError(f"Unknown partition '{partition}'.")
+        self.partition = partition
+        if partition == "range":
+            if boundaries is None:
+                boundaries = [chr(ord("a") + 26 * i // self.num_shards) for i in range(1, self.num_shards)]
+            if len(boundaries) != self.num_shards - 1 or list(boundaries) != sorted(boundaries):
+                raise ValueError("Range partitioning needs num_shards - 1 sorted boundaries.")
+        self.boundaries = [boundary.lower() for boundary in boundaries or []]
+
+        context = multiprocessing.get_context(start_method)
+        self._conns = []
+        self._processes = []
+        for _ in range(self.num_shards):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=shard_worker, args=(child_conn,), daemon=True)
+            process.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._processes.append(process)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+
+        for conn in self._conns:
+            try:
+                conn.send(None)
+                conn.close()
+            except (OSError, ValueError):
+                pass
+        for process in self._processes:
+            process.join()
+        self._conns = []
+        self._processes = []
+
+    def shard_of(self, owner_name):
+
+        key = owner_name.strip().lower()
+        if self.partition == "range":
+            return bisect_right(self.boundaries, key)
+        return zlib.crc32(key.encode("utf-8")) % self.num_shards
+
+    def _scatter(self, batches):
+        # batches: {shard: [(op, args), ...]}; send all first, then collect
+        for shard, batch in batches.items():
+            self._conns[shard].send(batch)
+        return {shard: self._conns[shard].recv() for shard in batches}
+
+    def call(self, op, owner_name, *args):
+        """Runs one per-owner operation on its shard and returns the result."""
+        shard = self.shard_of(owner_name)
+        return self._scatter({shard: [(op, (owner_name,) + args)]})[shard][0]
+
+    def execute_many(self, commands):
+        """
+        Runs a list of (op, owner_name, *args) commands and returns their
+        results in the same order. Commands for the same owner keep their
+        order; commands for different shards run concurrently.
+        """
+        batches = {}
+        positions = {}
+        for index, (op, owner_name, *args) in enumerate(commands):
+            shard = self.shard_of(owner_name)
+            batches.setdefault(shard, []).append((op, (owner_name,) + tuple(args)))
+            positions.setdefault(shard, []).append(index)
+        results = [None] * len(commands)
+        for shard, shard_results in self._scatter(batches).items():
+            for index, result in zip(positions[shard], shard_results):
+                results[index] = result
+        return results
+
+    def _broadcast(self, op):
+
+        return self._scatter({shard: [(op, ())] for shard in range(self.num_shards)})
+
+    def owner_count(self):
+
+        return sum(results[0] for results in self._broadcast("count").values())
+
+    def sorted_by_num_pokemon(self):
+        """
+        [(owner name, number of Pokemon), ...] in sort_owners_by_num_pokemon
+        order: each shard sends its ranking, already sorted, and the lists
+        are k-way merged.
+        """
+        per_shard = [results[0] for _, results in sorted(self._broadcast("ranking").items())]
+        return [(name, size) for size, _, name in heapq.merge(*per_shard)]
+
+    def iter_owners(self):
+        """Yields (owner name, [species records]) for every owner, in name order."""
+        by_id = ex7.get_catalog()["by_id"]
+        per_shard = [results[0] for _, results in sorted(self._broadcast("owners").items())]
+        if self.partition == "range":
+            merged = (owner for shard_owners in per_shard for owner in shard_owners)
+        else:
+            merged = heapq.merge(*per_shard, key=lambda owner: owner[0].lower())
+        for name, poke_ids in merged:
+            yield name, [by_id[poke_id] for poke_id in poke_ids if poke_id in by_id]
+
+    def sort_owners_by_num_pokemon(self, file=None, fmt=None):
+        """Same output as ex7.sort_owners_by_num_pokemon, across all shards."""
+        owners = self.sorted_by_num_pokemon()
+        with ex7.ListingSink(file, fmt) as sink:
+            if not owners:
+                sink.message("No owners at all.")
+                return
+            sink.message("=== The Owners we have, sorted by number of Pokemons ===")
+            for name, num_pokemons in owners:
+                sink.owner_count(name, num_pokemons)
+
+    def print_all_owners(self, file=None, fmt=None):
+        """
+        Prints every owner in name order, like ex7.in_order. (BFS, pre- and
+        post-order describe one tree's shape and have no meaning across shards.)
+        """
+        with ex7.ListingSink(file, fmt) as sink:
+            for name, pokes in self.iter_owners():
+                sink.owner(name, pokes)
+
+
+########################
+# Scaling benchmark
+########################
+
+def make_workload(num_owners, num_ops, seed):
+    """Owner creations followed by a random add/release/evolve/find mix."""
+    rng = random.Random(seed)
+    # Random leading letters spread the names over the alphabet, as range partitioning expects
+    names = ["".join(rng.choice(string.ascii_lowercase) for _ in range(3)).capitalize() + f"{i:08d}"
+             for i in range(num_owners)]
+    rng.shuffle(names)
+    commands = [("create", name, rng.randint(1, 3)) for name in names]
+    evolvable = ["Treecko", "Grovyle", "Torchic", "Combusken", "Mudkip", "Marshtomp"]
+    for _ in range(num_ops):
+        name = rng.choice(names)
+        kind = rng.random()
+        if kind < 0.4:
+            commands.append(("add", name, rng.randint(1, 135)))
+        elif kind < 0.55:
+            commands.append(("release", name, rng.choice(evolvable)))
+        elif kind < 0.7:
+            commands.append(("evolve", name, rng.choice(evolvable)))
+        else:
+            commands.append(("find", name))
+    return commands
+
+
+def range_boundaries(names, num_shards):
+    """Split points that give each of 'num_shards' range shards an equal share of 'names'."""
+    keys = sorted(name.strip().lower() for name in names)
+    if not keys:
+        return None
+    return [keys[len(keys) * i // num_shards] for i in range(1, num_shards)]
+
+
+def measure(num_shards, commands, chunk, partition):
+    """Runs the workload on a fresh store; returns (seconds, ops/sec, ranking seconds)."""
+    boundaries = None
+    if partition == "range":
+        boundaries = range_boundaries([command[1] for command in commands if command[0] == "create"], num_shards)
+    with ShardedOwnerStore(num_shards, partition=partition, boundaries=boundaries) as store:
+        store.owner_count()  # Wait until every worker is up
+        start = time.perf_counter()
+        for i in range(0, len(commands), chunk):
+            store.execute_many(commands[i:i + chunk])
+        elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        store.sorted_by_num_pokemon()
+        ranking = time.perf_counter() - start
+    return elapsed, len(commands) / elapsed, ranking
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Measure sharded owner store throughput across shard counts.")
+    parser.add_argument("--shards", type=int, nargs="+",
+                        default=sorted({1, 2, 4, multiprocessing.cpu_count()}))
+    parser.add_argument("--owners", type=int, default=50000)
+    parser.add_argument("--ops", type=int, default=200000)
+    parser.add_argument("--chunk", type=int, default=5000, help="commands per scatter-gather round trip")
+    parser.add_argument("--partition", choices=["hash", "range"], default="hash")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", metavar="JSON", help="save the results as JSON")
+    args = parser.parse_args(argv)
+
+    commands = make_workload(args.owners, args.ops, args.seed)
+    print(f"{len(commands)} commands, {multiprocessing.cpu_count()} CPUs")
+    results = []
+    baseline = None
+    for num_shards in args.shards:
+        elapsed, rate, ranking = measure(num_shards, commands, args.chunk, args.partition)
+        baseline = baseline or rate
+        results.append({"shards": num_shards, "seconds": elapsed, "ops_per_sec": rate,
+                        "speedup": rate / baseline, "ranking_seconds": ranking})
+        print(f"{num_shards:>3} shard(s): {rate:>10.0f} ops/s  x{rate / baseline:.2f}  "
+              f"(ranking scatter-gather {ranking * 1e3:.0f}ms)")
+    if args.out:
+        with open(args.out, mode='w', encoding='utf-8') as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
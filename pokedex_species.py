@@ -0,0 +1,100 @@
+# pokedex_species.py
+
+import ex7
+
+
+class SpeciesIndex:
+    """
+    Inverted index from species ID to the owners holding it:
+      { species ID: { lower-cased owner name: owner_node } }
+    kept up to date from ex7's mutation events, so "who owns X?" costs
+    O(owners returned) and "how many own X?" O(1), instead of a scan of
+    every Pokedex. rebuild() re-indexes from scratch; check() compares the
+    live index with a fresh one.
+    """
+
+    def __init__(self, root=None):
+        self._owners = {}
+        self.rebuild(root)
+
+    def rebuild(self, root):
+
+        self._owners = self.build(root)
+
+    @staticmethod
+    def build(root):
+
+        owners = {}
+        for owner_node in ex7.iter_inorder(root):
+            key = owner_node["name"].lower()
+            for poke in owner_node["pokedex"]:
+                owners.setdefault(poke["ID"], {})[key] = owner_node
+        return owners
+
+    def _add(self, poke_id, owner_node):
+
+        self._owners.setdefault(poke_id, {})[owner_node["name"].lower()] = owner_node
+
+    def _remove(self, poke_id, owner_node):
+
+        holders = self._owners.get(poke_id)
+        if holders is not None:
+            holders.pop(owner_node["name"].lower(), None)
+            if not holders:
+                del self._owners[poke_id]
+
+    def on_mutation(self, event, owner_node, detail):
+
+        if event == "reset":
+            self.rebuild(ex7.ownerRoot)
+        elif event in ("create", "add"):
+            self._add(detail["ID"], owner_node)
+        elif event == "release":
+            self._remove(detail["ID"], owner_node)
+        elif event == "evolve":
+            self._remove(detail["from"], owner_node)
+            self._add(detail["to"], owner_node)
+        elif event == "delete":
+            # The deleted node still holds its Pokedex
+            for poke in owner_node["pokedex"]:
+                self._remove(poke["ID"], owner_node)
+
+    def owners_of(self, poke_id):
+        """The owner nodes holding species poke_id, in no particular order."""
+        return list(self._owners.get(poke_id, {}).values())
+
+    def count(self, poke_id):
+        """How many owners hold species poke_id."""
+        return len(self._owners.get(poke_id, ()))
+
+    def counts_by_type(self, poke_type):
+        """[(species record, number of owners), ...] for every species of that type."""
+        return [(poke, self.count(poke["ID"])) for poke in ex7.get_pokes_by_type(poke_type)]
+
+    def check(self, root=None):
+        """
+        Rebuilds a fresh index from the tree (ex7.ownerRoot by default) and
+        returns the species IDs whose owner sets differ from the live index.
+        """
+        fresh = self.build(ex7.ownerRoot if root is None else root)
+        return sorted(poke_id for poke_id in set(fresh) | set(self._owners)
+                      if set(fresh.get(poke_id, ())) != set(self._owners.get(poke_id, ())))
+
+
+def enable_species_index():
+    """
+    Builds a SpeciesIndex over ex7.ownerRoot and subscribes it to mutation
+    events. Returns the index (the existing one if already enabled).
+    """
+    if ex7.SPECIES_INDEX is None:
+        index = SpeciesIndex(ex7.ownerRoot)
+        ex7.add_mutation_listener(index.on_mutation)
+        ex7.SPECIES_INDEX = index
+    return ex7.SPECIES_INDEX
+
+
+def disable_species_index():
+
+    if ex7.SPECIES_INDEX is not None:
+        ex7.remove_mutation_listener(ex7.SPECIES_INDEX.on_mutation)
+        ex7.SPECIES_INDEX = None
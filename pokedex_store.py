@@ -0,0 +1,198 @@
+# pokedex_store.py
+
+import json
+import os
+
+import ex7
+
+SNAPSHOT_FILE = "owners.snapshot.jsonl"
+JOURNAL_FILE = "owners.journal.jsonl"
+SNAPSHOT_FORMAT = "ex7-snapshot"
+SNAPSHOT_VERSION = 1
+
+
+def write_snapshot(path, root, seq):
+    """
+    Writes the owner tree to 'path' as JSON lines: a header line
+      {"format": "ex7-snapshot", "version": 1, "seq": seq, "owners": n}
+    followed by one {"name": ..., "pokedex": [ID, ...]} line per owner, in
+    name order. The file is written next to 'path' and renamed into place,
+    so a crash never leaves a half-written snapshot behind.
+    """
+    owners = []
+    ex7.gather_all_owners(root, owners)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, mode='w', encoding='utf-8') as f:
+        header = {"format": SNAPSHOT_FORMAT, "version": SNAPSHOT_VERSION,
+                  "seq": seq, "owners": len(owners)}
+        f.write(json.dumps(header) + "\n")
+        for owner in owners:
+            record = {"name": owner["name"], "pokedex": [poke["ID"] for poke in owner["pokedex"]]}
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path):
+    """
+    Loads a snapshot written by write_snapshot. Returns (root, seq).
+    The owners are stored in name order, so the tree is linked bottom-up into
+    a balanced tree in O(n) rather than inserted one by one. Pokemon IDs that
+    are no longer in the catalog are dropped.
+    """
+    owners = []
+    with open(path, mode='r', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get("format") != SNAPSHOT_FORMAT or header.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"{path} is not a version {SNAPSHOT_VERSION} ex7 snapshot.")
+        for line in f:
+            record = json.loads(line)
+            pokes = [ex7.get_poke_dict_by_id(poke_id) for poke_id in record["pokedex"]]
+            owners.append(ex7.make_owner_node(record["name"], [poke for poke in pokes if poke]))
+
+    # Written in order by write_snapshot, but don't trust a hand-edited file
+    keys = [owner["name"].lower() for owner in owners]
+    if any(keys[i] >= keys[i + 1] for i in range(len(keys) - 1)):
+        owners.sort(key=lambda owner: owner["name"].lower())
+    return ex7.build_balanced_owner_tree(owners), header["seq"]
+
+
+def apply_journal_record(root, record):
+    """
+    Re-applies one journal record to the tree rooted at 'root' and returns
+    the new root. Records describe the resulting change (by ID), not the
+    command that caused it, so replay needs no prompts and no catalog rules.
+    """
+    op = record["op"]
+    owner_node = ex7.find_owner_bst(root, record["owner"])
+    if op == "create":
+        if owner_node is None:
+            starter = ex7.get_poke_dict_by_id(record["ID"])
+            new_node = ex7.make_owner_node(record["owner"], [starter] if starter else [])
+            root = ex7.insert_owner_bst(root, new_node)
+    elif owner_node is None:
+        pass  # Owner was deleted later in a part of the journal we already skipped
+    elif op == "delete":
+        root = ex7.delete_owner_bst(root, record["owner"])
+    elif op == "add":
+        poke = ex7.get_poke_dict_by_id(record["ID"])
+        if poke:
+            owner_node["pokedex"].add(poke)
+    elif op == "release":
+        owner_node["pokedex"].remove(record["ID"])
+    elif op == "evolve":
+        owner_node["pokedex"].remove(record["from"])
+        poke = ex7.get_poke_dict_by_id(record["to"])
+        if poke:
+            owner_node["pokedex"].add(poke)
+    else:
+        raise ValueError(f"Unknown journal op '{op}'.")
+    return root
+
+
+class PokedexStore:
+    """
+    Keeps ex7.ownerRoot on disk as a snapshot plus an append-only journal in
+    'directory'. open() loads the latest snapshot, replays the journal
+    records written after it, and from then on appends every mutation made
+    through the ex7 cores to the journal. Once 'compact_every' records have
+    piled up, the tree is re-snapshotted and the journal is truncated.
+    """
+
+    def __init__(self, directory, compact_every=10000, fsync=False):
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.journal_path = os.path.join(directory, JOURNAL_FILE)
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.seq = 0
+        self.journal_records = 0
+        self._journal = None
+
+    def open(self):
+        """
+        Loads the stored state into ex7.ownerRoot and starts journaling.
+        Returns (number of owners loaded from the snapshot, number of journal
+        records replayed).
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        root, self.seq = None, 0
+        if os.path.exists(self.snapshot_path):
+            root, self.seq = read_snapshot(self.snapshot_path)
+        loaded = sum(1 for _ in ex7.iter_inorder(root))
+
+        replayed = 0
+        # A torn line (crash mid-write) must not be appended to, or the next
+        # record would be glued onto it; such a journal is compacted below
+        damaged = False
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, mode='r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        damaged = True
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        damaged = True
+                        continue  # Skip it; later records are still good
+                    self.journal_records += 1
+                    if record["seq"] <= self.seq:
+                        continue  # Already part of the snapshot
+                    root = apply_journal_record(root, record)
+                    self.seq = record["seq"]
+                    replayed += 1
+
+        if ex7.OWNER_TREE_BALANCED and not ex7.check_owner_tree(root)["is_avl"]:
+            owners = []
+            ex7.gather_all_owners(root, owners)
+            root = ex7.build_balanced_owner_tree(owners)
+        ex7.ownerRoot = root
+        ex7.notify_mutation("reset", None, {})
+
+        if damaged:
+            self.compact()
+        else:
+            self._journal = open(self.journal_path, mode='a', encoding='utf-8')
+        ex7.add_mutation_listener(self.on_mutation)
+        return loaded, replayed
+
+    def on_mutation(self, event, owner_node, detail):
+
+        if event == "reset":
+            # Someone else replaced the whole tree; the journal can't describe that
+            self.compact()
+            return
+        self.seq += 1
+        record = {"seq": self.seq, "op": event, "owner": owner_node["name"]}
+        if event == "evolve":
+            record["from"] = detail["from"]
+            record["to"] = detail["to"]
+        elif "ID" in detail:
+            record["ID"] = detail["ID"]
+        self._journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+        self.journal_records += 1
+        if self.compact_every and self.journal_records >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """Snapshots the current tree and empties the journal."""
+        write_snapshot(self.snapshot_path, ex7.ownerRoot, self.seq)
+        # A crash right here is harmless: the old records have seq <= the
+        # snapshot's seq and are skipped on the next open()
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = open(self.journal_path, mode='w', encoding='utf-8')
+        self.journal_records = 0
+
+    def close(self, compact=True):
+
+        ex7.remove_mutation_listener(self.on_mutation)
+        if compact and self.journal_records:
+            self.compact()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
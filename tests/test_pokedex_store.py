@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ex7
+import pokedex_store
+
+
+class JournalCrashRecoveryTest(unittest.TestCase):
+
+    def setUp(self):
+        ex7.ownerRoot = None
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        ex7.ownerRoot = None
+
+    def crash(self, store):
+        # Stop journaling without the compaction a clean close() would do
+        store.close(compact=False)
+
+    def reopen(self):
+        ex7.ownerRoot = None
+        store = pokedex_store.PokedexStore(self.directory)
+        store.open()
+        return store
+
+    def test_torn_line_then_crash_again_keeps_new_records(self):
+        store = self.reopen()
+        ex7.create_owner("Ash", 1)
+        ex7.add_pokemon_id(ex7.find_owner_bst(ex7.ownerRoot, "Ash"), 25)
+        self.crash(store)
+        with open(os.path.join(self.directory, pokedex_store.JOURNAL_FILE), mode='a', encoding='utf-8') as f:
+            f.write('{"seq": 3, "op": "ad')  # Crash mid-write
+
+        store = self.reopen()
+        ex7.create_owner("Brock", 2)
+        ex7.add_pokemon_id(ex7.find_owner_bst(ex7.ownerRoot, "Brock"), 7)
+        self.crash(store)
+
+        store = self.reopen()
+        ash = ex7.find_owner_bst(ex7.ownerRoot, "Ash")
+        brock = ex7.find_owner_bst(ex7.ownerRoot, "Brock")
+        self.assertIsNotNone(brock)
+        self.assertEqual([poke["ID"] for poke in ash["pokedex"]], [1, 25])
+        self.assertEqual([poke["ID"] for poke in brock["pokedex"]], [4, 7])
+        store.close()
+
+    def test_records_after_a_corrupt_line_are_replayed(self):
+        store = self.reopen()
+        ex7.create_owner("Ash", 1)
+        self.crash(store)
+        with open(os.path.join(self.directory, pokedex_store.JOURNAL_FILE), mode='a', encoding='utf-8') as f:
+            f.write('garbage\n{"seq": 2, "op": "add", "owner": "Ash", "ID": 25}\n')
+
+        store = self.reopen()
+        ash = ex7.find_owner_bst(ex7.ownerRoot, "Ash")
+        self.assertEqual([poke["ID"] for poke in ash["pokedex"]], [1, 25])
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()